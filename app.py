@@ -1,18 +1,19 @@
 import streamlit as st
-import google.generativeai as genai
 from PIL import Image
 import os
 from dotenv import load_dotenv
+from ml_model.llm_client import LLMClient
 
 load_dotenv()
 
 GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
-genai.configure(api_key=GOOGLE_API_KEY)
+# LLM_BACKEND=local answers with the offline stand-in instead of Gemini
+llm = LLMClient.from_name(os.getenv('LLM_BACKEND', 'gemini'), api_key=GOOGLE_API_KEY)
 
 def analyze_ui_image(image):
     """Analyze UI image using Gemini Vision API"""
     try:
-        model = genai.GenerativeModel('gemini-pro-vision')
+        model = llm.model('gemini-pro-vision')
         
         prompt = """
         Analyze this UI image and provide:
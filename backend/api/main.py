@@ -1,23 +1,109 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
-import numpy as np
-import cv2
 import os
+import json
+import asyncio
+import threading
+import time
 from dotenv import load_dotenv
 
+try:
+    import resource  # POSIX only
+except ImportError:
+    resource = None
+
 load_dotenv()
 
 from ml_model.yolo_model import YOLOObjectDetector
-from ml_model.content_generator import ContentGenerator
+from ml_model.batching import BatchingDetector
+from ml_model.enhancement import (
+    EnhancementMetrics,
+    create_enhancement_pipeline,
+    create_preprocess_executor,
+    preprocess_upload,
+)
+from ml_model.result_cache import PerceptualResultCache, image_hash_from_bytes
+from ml_model.annotation import ENCODINGS, Annotator
+from ml_model.content_generator import ContentGenerator, content_events, merge_content_event
+from ml_model.llm_client import LLMClient
+from ml_model.content_store import ContentStore
+from ml_model.knowledge_base import KnowledgeBase
+from ml_model.web_scraper import WebScraper
 from ml_model.advanced_features import AdvancedAIFeatures, AIGameMaster, InteractiveTutor
+from ml_model.model_provider import default_provider
+from ml_model.taxonomy import Taxonomy, default_taxonomy
 from utils.gamification import GamificationSystem
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if not GEMINI_API_KEY:
+# LLM backend: gemini, or local (deterministic offline stand-in for load tests; needs no key)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+if not GEMINI_API_KEY and LLM_BACKEND == "gemini":
     raise RuntimeError("⚠️ ERROR: GEMINI_API_KEY is missing! Set it in .env")
 
+# Detector backend: pytorch, onnx or openvino (optionally INT8-quantized); exports are cached on disk
+DETECTOR_BACKEND = os.getenv("DETECTOR_BACKEND", "pytorch")
+DETECTOR_INT8 = os.getenv("DETECTOR_INT8", "0") == "1"
+DETECTOR_EXPORT_DIR = os.getenv("DETECTOR_EXPORT_DIR", "models")
+
+# Class-to-category taxonomy (JSON); edits are picked up without a restart
+TAXONOMY_PATH = os.getenv("TAXONOMY_PATH")
+
+# Detection batching: requests arriving within the window share one forward pass
+DETECT_MAX_BATCH_SIZE = int(os.getenv("DETECT_MAX_BATCH_SIZE", "8"))
+DETECT_MAX_WAIT_MS = float(os.getenv("DETECT_MAX_WAIT_MS", "10"))
+# Letterbox each batch into a reusable buffer instead of per-image model preprocessing
+DETECT_LETTERBOX = os.getenv("DETECT_LETTERBOX", "1") == "1"
+
+# Worker pools keep decoding, enhancement and inference off the event loop
+PREPROCESS_EXECUTOR = os.getenv("PREPROCESS_EXECUTOR", "process")
+PREPROCESS_WORKERS = int(os.getenv("PREPROCESS_WORKERS", "0")) or os.cpu_count()
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "1"))
+
+# Enhancement: adaptive (per-image tiers), full (always NLM + CLAHE) or none
+ENHANCEMENT_MODE = os.getenv("ENHANCEMENT_MODE", "adaptive")
+
+# Annotated images returned by /detect/image?annotate=jpeg
+ANNOTATE_QUALITY = int(os.getenv("ANNOTATE_QUALITY", "80"))
+ANNOTATE_MAX_SIDE = int(os.getenv("ANNOTATE_MAX_SIDE", "1280"))
+
+# Perceptual-hash cache of /detect/image results for repeated or near-identical uploads
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "1") == "1"
+RESULT_CACHE_MAX_DISTANCE = int(os.getenv("RESULT_CACHE_MAX_DISTANCE", "4"))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "512"))
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "3600"))
+RESULT_CACHE_MAX_MB = float(os.getenv("RESULT_CACHE_MAX_MB", "64"))
+
+# Disk-backed store of generated learning modules, shared across restarts
+CONTENT_STORE_ENABLED = os.getenv("CONTENT_STORE_ENABLED", "1") == "1"
+CONTENT_STORE_PATH = os.getenv("CONTENT_STORE_PATH", "data/content_store.db")
+CONTENT_STORE_TTL_SECONDS = float(os.getenv("CONTENT_STORE_TTL_SECONDS", str(7 * 24 * 3600)))
+CONTENT_STORE_MAX_ENTRIES = int(os.getenv("CONTENT_STORE_MAX_ENTRIES", "5000"))
+
+# Learning-content fan-out: concurrent scraping/LLM calls and the whole-request deadline
+CONTENT_MAX_CONCURRENCY = int(os.getenv("CONTENT_MAX_CONCURRENCY", "8"))
+CONTENT_REQUEST_TIMEOUT = float(os.getenv("CONTENT_REQUEST_TIMEOUT", "30"))
+# One delimited prompt for all uncached modules of a request instead of one per component
+CONTENT_BATCH_PROMPTS = os.getenv("CONTENT_BATCH_PROMPTS", "0") == "1"
+
+# Shared LLM client: call rate, calls in flight, per-call deadline and retries of throttled/transient errors
+LLM_RATE_PER_SECOND = float(os.getenv("LLM_RATE_PER_SECOND", "5"))
+LLM_BURST = int(os.getenv("LLM_BURST", "10"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_LOCAL_LATENCY = float(os.getenv("LLM_LOCAL_LATENCY", "0.05"))
+
+# Local knowledge base answered before live Wikipedia; OFFLINE_MODE=1 never hits the network
+KNOWLEDGE_BASE_PATH = os.getenv("KNOWLEDGE_BASE_PATH")
+OFFLINE_MODE = os.getenv("OFFLINE_MODE", "0") == "1"
+
+# transformers pipelines load on first use; set to 1 to load them in the background at startup
+WARM_MODELS = os.getenv("WARM_MODELS", "0") == "1"
+
 app = FastAPI(title="EduScope API")
 
 app.add_middleware(
@@ -28,14 +114,75 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+taxonomy = Taxonomy(TAXONOMY_PATH) if TAXONOMY_PATH else default_taxonomy
+
+def create_detector():
+    """Build a detector with the configured inference backend"""
+    return YOLOObjectDetector(backend=DETECTOR_BACKEND, int8=DETECTOR_INT8, export_dir=DETECTOR_EXPORT_DIR,
+                              taxonomy=taxonomy)
+
 # Initialize AI components
-detector = YOLOObjectDetector()
-content_generator = ContentGenerator(api_key=GEMINI_API_KEY)  # ✅ Fixed initialization
+detector = create_detector()
+# Ultralytics predictors are not thread-safe, so each inference worker gets its own model
+inference_detectors = [detector] + [create_detector() for _ in range(INFERENCE_WORKERS - 1)]
+batcher = BatchingDetector(inference_detectors, max_batch_size=DETECT_MAX_BATCH_SIZE,
+                           max_wait_ms=DETECT_MAX_WAIT_MS, letterbox=DETECT_LETTERBOX)
+preprocess_pool = create_preprocess_executor(PREPROCESS_EXECUTOR, PREPROCESS_WORKERS)
+enhancement_pipeline = create_enhancement_pipeline(ENHANCEMENT_MODE)
+enhancement_metrics = EnhancementMetrics()
+annotator = Annotator()
+result_cache = PerceptualResultCache(
+    max_distance=RESULT_CACHE_MAX_DISTANCE,
+    max_entries=RESULT_CACHE_MAX_ENTRIES,
+    ttl_seconds=RESULT_CACHE_TTL_SECONDS,
+    max_bytes=int(RESULT_CACHE_MAX_MB * 1024 * 1024),
+)
+content_store = ContentStore(
+    CONTENT_STORE_PATH,
+    ttl_seconds=CONTENT_STORE_TTL_SECONDS,
+    max_entries=CONTENT_STORE_MAX_ENTRIES,
+) if CONTENT_STORE_ENABLED else None
+knowledge_base = KnowledgeBase(KNOWLEDGE_BASE_PATH) if KNOWLEDGE_BASE_PATH else None
+llm_client = LLMClient.from_name(
+    LLM_BACKEND,
+    api_key=GEMINI_API_KEY,
+    local_latency=LLM_LOCAL_LATENCY,
+    rate_per_second=LLM_RATE_PER_SECOND,
+    burst=LLM_BURST,
+    max_concurrency=LLM_MAX_CONCURRENCY,
+    timeout=LLM_TIMEOUT,
+    max_retries=LLM_MAX_RETRIES,
+)
+content_generator = ContentGenerator(
+    api_key=GEMINI_API_KEY,
+    llm=llm_client,
+    store=content_store,
+    max_concurrency=CONTENT_MAX_CONCURRENCY,
+    request_timeout=CONTENT_REQUEST_TIMEOUT,
+    batch_prompts=CONTENT_BATCH_PROMPTS,
+    scraper=WebScraper(knowledge_base=knowledge_base, offline=OFFLINE_MODE),
+)  # ✅ Fixed initialization
 advanced_ai = AdvancedAIFeatures()
 game_master = AIGameMaster()
-tutor = InteractiveTutor()
+tutor = InteractiveTutor(llm=llm_client)
 gamification = GamificationSystem()
 
+@app.on_event("startup")
+def warm_models():
+    """Optionally load the transformers pipelines without blocking startup"""
+    if WARM_MODELS:
+        default_provider.warm()
+
+@app.on_event("shutdown")
+def shutdown_workers():
+    """Drain the detection batcher and preprocessing pool on shutdown"""
+    batcher.shutdown()
+    preprocess_pool.shutdown()
+    if content_store is not None:
+        content_store.close()
+    if knowledge_base is not None:
+        knowledge_base.close()
+
 class TutorRequest(BaseModel):
     concept: str
     user_level: int
@@ -59,8 +206,42 @@ class CollaborationRoom(BaseModel):
 class LearningStyleRequest(BaseModel):
     user_interactions: list
     
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+def _format_event(event, stream):
+    """Encode one event as an NDJSON line or a Server-Sent Event"""
+    data = json.dumps(event)
+    if stream == "sse":
+        return f"event: {event['type']}\ndata: {data}\n\n"
+    return data + "\n"
+
+def _stream_response(events, stream):
+    return StreamingResponse((_format_event(e, stream) for e in events), media_type=STREAM_MEDIA_TYPES[stream])
+
+def _content_stream(events, first_event=None, on_complete=None):
+    """Yield an optional leading event, then content events as they finish, then "done"
+
+    on_complete receives the assembled learning content once the stream ends.
+    """
+    if first_event is not None:
+        yield first_event
+
+    learning_content = {"learning_modules": {}, "project_suggestions": []}
+    try:
+        for event in events:
+            merge_content_event(learning_content, event)
+            yield event
+    except Exception as e:
+        print(f"⚠️ Content streaming error: {e}")
+        yield {"type": "error", "detail": str(e)}
+        return
+
+    if on_complete is not None:
+        on_complete(learning_content)
+    yield {"type": "done"}
+
 @app.post("/analyze/learning-style")
-async def analyze_learning_style(request: LearningStyleRequest):
+def analyze_learning_style(request: LearningStyleRequest):
     """Analyze user's learning style based on interactions"""
     try:
         # Analyze learning style using AI
@@ -69,52 +250,313 @@ async def analyze_learning_style(request: LearningStyleRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _annotated_response(image, detections, fmt, quality, max_side):
+    """Draw detections onto the decoded upload (owned by this request) and encode it"""
+    annotator.annotate(image, detections, in_place=True)
+    classes = content_generator.detected_classes(detections)
+    count = len(detections["classes"]) if detections.get("format") == "columnar" else len(detections["objects"])
+    return Response(
+        content=annotator.encode(image, fmt, quality=quality, max_side=max_side),
+        media_type=ENCODINGS[fmt][2],
+        headers={
+            "X-Detected-Count": str(count),
+            "X-Detected-Classes": ",".join(sorted(classes)),
+        },
+    )
+
+async def _detect_tiled(image, output_format):
+    """Tiled inference with every tile submitted to the batcher, so tiles share forward passes"""
+    crops, offsets = await run_in_threadpool(detector.tile_image, image)
+    results = await asyncio.gather(*(asyncio.wrap_future(batcher.submit(crop, "columnar")) for crop in crops))
+    print(f"📢 Tiled inference over {len(crops)} crops")
+    return detector.merge_tiles(results, offsets, output_format)
+
 @app.post("/detect/image")
-async def detect_image(file: UploadFile = File(...)):
-    """Process uploaded image, detect objects, and generate learning content"""
+async def detect_image(file: UploadFile = File(...), output_format: str = "objects", refresh: bool = False,
+                       stream: Optional[str] = None, tiled: bool = False, annotate: Optional[str] = None,
+                       quality: int = ANNOTATE_QUALITY, max_side: int = ANNOTATE_MAX_SIDE):
+    """Process uploaded image, detect objects, and generate learning content
+
+    output_format=columnar returns parallel arrays (classes, confidences,
+    bboxes, centers) instead of one dict per object. refresh=true bypasses
+    the result cache and regenerates stored learning modules. stream=ndjson
+    or stream=sse sends detections first, then each learning module and the
+    project suggestions as soon as they are generated. tiled=true also runs
+    overlapping full-resolution tiles of large photos to find small objects.
+    annotate=jpeg (or webp) returns the image with boxes drawn, encoded at
+    `quality` with its longer side capped at `max_side`; detections are
+    summarized in X-Detected-* headers and no learning content is generated.
+    """
+    if output_format not in ("objects", "columnar"):
+        raise HTTPException(status_code=400, detail=f"Unsupported output format: {output_format}")
+    if stream is not None and stream not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported stream format: {stream}")
+    if annotate is not None and annotate not in ENCODINGS:
+        raise HTTPException(status_code=400, detail=f"Unsupported annotation format: {annotate}")
+    # Categories come from the taxonomy, so a reload must not serve results cached before it
+    cache_namespace = f"{output_format}:{'tiled:' if tiled else ''}taxonomy-{taxonomy.version}"
+
     try:
         contents = await file.read()
-        nparr = np.frombuffer(contents, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
 
-        if image is None:
-            raise ValueError("Uploaded image could not be decoded.")
+        # Re-uploads and near-identical frames are answered from the cache
+        if RESULT_CACHE_ENABLED and not annotate:
+            image_hash = await run_in_threadpool(image_hash_from_bytes, contents)
+            cached = None if refresh else result_cache.get(image_hash, namespace=cache_namespace)
+            if cached is not None:
+                response, distance = cached
+                print(f"✅ Result cache hit (distance {distance})")
+                cache_info = {"hit": True, "distance": distance}
+                if stream:
+                    detection_part = {k: v for k, v in response.items() if k != "learning_content"}
+                    return _stream_response(_content_stream(
+                        content_events(response["learning_content"]),
+                        first_event={"type": "detections", **detection_part, "cache": cache_info},
+                    ), stream)
+                return {**response, "cache": cache_info}
 
-        image = cv2.fastNlMeansDenoisingColored(image, None, 10, 10, 7, 21)  # Denoise
-        
-        lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
-        l, a, b = cv2.split(lab)
-        clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8,8))
-        cl = clahe.apply(l)
-        enhanced = cv2.merge((cl,a,b))
-        image = cv2.cvtColor(enhanced, cv2.COLOR_LAB2BGR)
-        
-        # Adjust brightness and contrast
-        alpha = 1.2  # Contrast control
-        beta = 10    # Brightness control
-        image = cv2.convertScaleAbs(image, alpha=alpha, beta=beta)
+        # Decode, denoise and enhance in the worker pool
+        loop = asyncio.get_running_loop()
+        image, enhancement = await loop.run_in_executor(
+            preprocess_pool, preprocess_upload, contents, enhancement_pipeline
+        )
+        enhancement_metrics.record(enhancement)
 
-        print(f"✅ Image processed. Shape: {image.shape}")
+        print(f"✅ Image processed. Shape: {image.shape}, enhancement tier: {enhancement['tier']}")
 
         # Detect objects
-        detections = detector.detect_objects(image)
+        if tiled:
+            detections = await _detect_tiled(image, output_format)
+        else:
+            detections = await asyncio.wrap_future(batcher.submit(image, output_format))
         print(f"📢 Detections: {detections}")
 
-        content = content_generator.generate_learning_content(detections)
+        if annotate:
+            return await run_in_threadpool(_annotated_response, image, detections, annotate, quality, max_side)
+
+        if stream:
+            def cache_result(learning_content):
+                if RESULT_CACHE_ENABLED and "incomplete" not in learning_content:
+                    result_cache.put(image_hash, {
+                        **detections,
+                        "learning_content": learning_content,
+                        "enhancement": enhancement
+                    }, namespace=cache_namespace)
+
+            return _stream_response(_content_stream(
+                content_generator.iter_learning_content(detections, refresh),
+                first_event={"type": "detections", **detections, "enhancement": enhancement, "cache": {"hit": False}},
+                on_complete=cache_result,
+            ), stream)
+
+        content = await run_in_threadpool(content_generator.generate_learning_content, detections, refresh)
         print(f"📢 AI Generated Content: {content}")
 
-        return {
-            "objects": detections["objects"], 
-            "categories": detections["categories"], 
-            "learning_content": content
+        response = {
+            **detections,
+            "learning_content": content,
+            "enhancement": enhancement
         }
+        # Partial content is not cached so the next upload retries the missing parts
+        if RESULT_CACHE_ENABLED and "incomplete" not in content:
+            result_cache.put(image_hash, response, namespace=cache_namespace)
+
+        return {**response, "cache": {"hit": False}}
 
     except Exception as e:
         print(f"⚠️ Error in image processing: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/detect/images")
+async def detect_images(files: List[UploadFile] = File(...), output_format: str = "objects", refresh: bool = False):
+    """Detect objects in many uploaded images and generate one combined set of learning content
+
+    Images are preprocessed in parallel and share detection batches. The
+    union of detected classes is deduplicated before content generation, so
+    each distinct component's module is generated once per request. Images
+    that fail to decode are reported individually instead of failing the batch.
+    """
+    if output_format not in ("objects", "columnar"):
+        raise HTTPException(status_code=400, detail=f"Unsupported output format: {output_format}")
+
+    try:
+        uploads = await asyncio.gather(*(file.read() for file in files))
+
+        # Decode, denoise and enhance every image in the worker pool at once
+        loop = asyncio.get_running_loop()
+        preprocessed = await asyncio.gather(*(
+            loop.run_in_executor(preprocess_pool, preprocess_upload, contents, enhancement_pipeline)
+            for contents in uploads
+        ), return_exceptions=True)
+
+        # Submitting together lets the batcher fill whole batches
+        pending = {}
+        for index, item in enumerate(preprocessed):
+            if not isinstance(item, Exception):
+                image, enhancement = item
+                enhancement_metrics.record(enhancement)
+                pending[index] = asyncio.wrap_future(batcher.submit(image, output_format))
+        detected = dict(zip(pending, await asyncio.gather(*pending.values(), return_exceptions=True)))
+
+        images = []
+        classes = set()
+        for index, file in enumerate(files):
+            result = detected.get(index, preprocessed[index])
+            if isinstance(result, Exception):
+                print(f"⚠️ Error processing {file.filename}: {result}")
+                images.append({"filename": file.filename, "error": str(result)})
+                continue
+            classes.update(content_generator.detected_classes(result))
+            images.append({"filename": file.filename, **result, "enhancement": preprocessed[index][1]})
+
+        classes = sorted(classes)
+        print(f"✅ Processed {len(files)} images, {len(classes)} distinct classes")
+
+        if not classes:
+            # Nothing decoded or detected: no components to prompt the LLM about
+            return {"images": images, "classes": classes,
+                    "learning_content": {"learning_modules": {}, "project_suggestions": []}}
+
+        content = await run_in_threadpool(
+            content_generator.generate_learning_content,
+            {"objects": [{"class": name} for name in classes]},
+            refresh,
+        )
+        return {"images": images, "classes": classes, "learning_content": content}
+
+    except Exception as e:
+        print(f"⚠️ Error in batch image processing: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Live camera streams over /ws/detect
+websocket_stats = {"connections": 0, "active": 0, "frames_received": 0, "frames_processed": 0, "frames_dropped": 0}
+
+async def _receive_latest_frames(websocket, slot):
+    """Keep only the newest frame from the client; older unprocessed frames are dropped"""
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            contents = message.get("bytes")
+            if not contents:
+                continue  # Text messages are ignored
+            websocket_stats["frames_received"] += 1
+            if slot["frame"] is not None:
+                slot["dropped"] += 1
+                websocket_stats["frames_dropped"] += 1
+            slot["frame"] = contents
+            slot["received_at"] = time.monotonic()
+            slot["ready"].set()
+    finally:
+        slot["closed"] = True
+        slot["ready"].set()
+
+@app.websocket("/ws/detect")
+async def ws_detect(websocket: WebSocket, output_format: str = "objects"):
+    """Detect objects in a stream of JPEG frames sent as binary messages
+
+    Each processed frame is answered with a "detections" message. Frames that
+    arrive while one is being processed replace each other, so a fast client
+    only ever waits for the newest frame. Learning content is generated in the
+    background, and sent as a "learning_content" message, only when the set
+    of detected classes changes.
+    """
+    await websocket.accept()
+    if output_format not in ("objects", "columnar"):
+        await websocket.close(code=1003, reason=f"Unsupported output format: {output_format}")
+        return
+
+    websocket_stats["connections"] += 1
+    websocket_stats["active"] += 1
+    slot = {"frame": None, "received_at": None, "dropped": 0, "closed": False, "ready": asyncio.Event()}
+    receiver = asyncio.create_task(_receive_latest_frames(websocket, slot))
+    send_lock = asyncio.Lock()
+    content_task = None
+    content_classes = None
+    frame_number = 0
+
+    async def send(message):
+        async with send_lock:
+            await websocket.send_json(message)
+
+    def generate_until_cancelled(detections, deadline, cancelled):
+        """Assemble learning content, giving up at the deadline or when the task is cancelled"""
+        content = {"learning_modules": {}, "project_suggestions": []}
+        events = content_generator.iter_learning_content(detections, timeout=max(0.0, deadline - time.monotonic()))
+        try:
+            for event in events:
+                if cancelled.is_set():
+                    break
+                merge_content_event(content, event)
+        finally:
+            events.close()  # Drops the calls that have not started
+        return content
+
+    async def send_learning_content(detections, classes):
+        # Cancelling the task only stops the await; the event also stops the generation in the threadpool
+        deadline = time.monotonic() + CONTENT_REQUEST_TIMEOUT
+        cancelled = threading.Event()
+        try:
+            content = await run_in_threadpool(generate_until_cancelled, detections, deadline, cancelled)
+            await send({"type": "learning_content", "classes": classes, "learning_content": content})
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        except Exception as e:
+            print(f"⚠️ WebSocket content error: {e}")
+
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            await slot["ready"].wait()
+            slot["ready"].clear()
+            contents, received_at = slot["frame"], slot["received_at"]
+            slot["frame"] = None
+            if contents is None:
+                if slot["closed"]:
+                    break
+                continue
+
+            frame_number += 1
+            try:
+                image, enhancement = await loop.run_in_executor(
+                    preprocess_pool, preprocess_upload, contents, enhancement_pipeline
+                )
+                enhancement_metrics.record(enhancement)
+                detections = await asyncio.wrap_future(batcher.submit(image, output_format))
+            except Exception as e:
+                await send({"type": "error", "frame": frame_number, "detail": str(e)})
+                continue
+
+            websocket_stats["frames_processed"] += 1
+            await send({
+                "type": "detections",
+                "frame": frame_number,
+                **detections,
+                "dropped_frames": slot["dropped"],
+                "latency_ms": (time.monotonic() - received_at) * 1000.0,
+            })
+
+            classes = sorted(set(content_generator.detected_classes(detections)))
+            if classes and classes != content_classes:
+                content_classes = classes
+                # Content for a class set the client has moved past is no longer wanted
+                if content_task is not None and not content_task.done():
+                    content_task.cancel()
+                content_task = asyncio.create_task(send_learning_content(detections, classes))
+    except WebSocketDisconnect:
+        pass
+    except RuntimeError as e:
+        print(f"⚠️ WebSocket closed: {e}")
+    finally:
+        websocket_stats["active"] -= 1
+        receiver.cancel()
+        if content_task is not None:
+            content_task.cancel()
+
 @app.post("/tutor/explain")
-async def tutor_explain(request: TutorRequest):
+def tutor_explain(request: TutorRequest):
     """Generate AI-based explanation for a given topic"""
     try:
         if not request.concept:
@@ -138,7 +580,7 @@ class ProjectComponentsRequest(BaseModel):
     team_size: int = 1
 
 @app.post("/projects/suggest")
-async def suggest_projects(request: ProjectComponentsRequest):
+def suggest_projects(request: ProjectComponentsRequest):
     """Suggest projects based on detected components"""
     try:
         print(f"📢 Project suggestion request: {request}")
@@ -177,18 +619,64 @@ async def get_leaderboard():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/taxonomy/reload")
+def reload_taxonomy():
+    """Re-read the class-to-category taxonomy file"""
+    try:
+        return taxonomy.reload()
+    except (OSError, ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not load taxonomy: {e}")
+
+@app.get("/metrics")
+async def get_metrics():
+    """Expose runtime performance metrics"""
+    return {
+        "detection_batching": batcher.stats(),
+        "enhancement": enhancement_metrics.stats(),
+        "annotation": annotator.stats(),
+        "result_cache": result_cache.stats(),
+        "content_store": content_store.stats() if content_store is not None else None,
+        "content_generation": content_generator.stats(),
+        "llm": llm_client.stats(),
+        "websocket": dict(websocket_stats),
+        "models": default_provider.status(),
+        "process": {
+            # ru_maxrss is reported in kilobytes on Linux; not available on Windows
+            "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else None
+        }
+    }
+
 @app.post("/content/generate")
-async def generate_content(request: dict):
+def generate_content(request: dict):
     """Generate learning content based on components or detections"""
     try:
         print(f"📢 Content request: {request}")
-        
+
+        stream = request.get("stream")
+        if stream is not None and stream not in STREAM_MEDIA_TYPES:
+            raise HTTPException(status_code=400, detail=f"Unsupported stream format: {stream}")
+        try:
+            team_size = int(request.get("team_size") or 1)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail=f"Invalid team_size: {request.get('team_size')}")
+        if stream and request.get("type") != "projects":
+            # Stream learning modules and project suggestions as they finish
+            detection_data = {
+                "objects": [{"class": comp} for comp in request["components"]]
+            }
+            return _stream_response(_content_stream(content_generator.iter_learning_content(
+                detection_data, force_refresh=request.get("force_refresh", False),
+                difficulty=request.get("difficulty", "Beginner"), team_size=team_size
+            )), stream)
+
         if request.get("type") == "learning":
             # Generate only learning content
             detection_data = {
                 "objects": [{"class": comp} for comp in request["components"]]
             }
-            return content_generator.generate_learning_content(detection_data)
+            return content_generator.generate_learning_content(
+                detection_data, force_refresh=request.get("force_refresh", False)
+            )
             
         elif request.get("type") == "projects":
             # Generate only project suggestions
@@ -196,7 +684,8 @@ async def generate_content(request: dict):
                 "project_suggestions": content_generator.generate_project_suggestions(
                     components=request["components"],
                     difficulty=request.get("difficulty", "Beginner"),
-                    team_size=request.get("team_size", 1)
+                    team_size=team_size,
+                    force_refresh=request.get("force_refresh", False)
                 )
             }
             
@@ -205,15 +694,22 @@ async def generate_content(request: dict):
             detection_data = {
                 "objects": [{"class": comp} for comp in request["components"]]
             }
-            content = content_generator.generate_learning_content(detection_data)
+            # Projects are generated for the requested difficulty and team size and
+            # registered, so a follow-up /projects/suggest call reuses them
+            content = content_generator.generate_learning_content(
+                detection_data, force_refresh=request.get("force_refresh", False),
+                difficulty=request.get("difficulty", "Beginner"), team_size=team_size
+            )
             
             if "project_suggestions" in content:
                 for project in content["project_suggestions"]:
                     project["difficulty"] = request.get("difficulty", "Beginner")
-                    project["team_size"] = request.get("team_size", 1)
+                    project["team_size"] = team_size
             
             return content
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"⚠️ Content Generation Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,117 @@
+# benchmarks/bench_backends.py
+"""
+Parity and speed benchmark for YOLOObjectDetector inference backends.
+
+Every variant is compared with the PyTorch reference on test.jpg and on
+synthetic images derived from it (rescaled, flipped, darkened and tiled
+collages). Parity is the fraction of reference detections matched by the
+same class with IoU >= 0.5, plus the mean IoU and largest confidence
+difference of the matches.
+
+Usage:
+    python -m benchmarks.bench_backends --variants onnx onnx-int8 openvino openvino-int8
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from ml_model.yolo_model import YOLOObjectDetector
+
+VARIANTS = {
+    'pytorch': ('pytorch', False),
+    'onnx': ('onnx', False),
+    'onnx-int8': ('onnx', True),
+    'openvino': ('openvino', False),
+    'openvino-int8': ('openvino', True),
+}
+
+
+def synthetic_images(image):
+    """Derive a small test set from one photo"""
+    h, w = image.shape[:2]
+    collage = np.vstack([np.hstack([image, cv2.flip(image, 1)]), np.hstack([cv2.flip(image, 0), image])])
+    return {
+        'test.jpg': image,
+        'half': cv2.resize(image, (w // 2, h // 2)),
+        'double': cv2.resize(image, (w * 2, h * 2)),
+        'flipped': cv2.flip(image, 1),
+        'dark': cv2.convertScaleAbs(image, alpha=0.4, beta=0),
+        'collage': collage,
+    }
+
+
+def box_iou(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def compare(reference, candidate):
+    """Greedily match candidate detections to the reference ones"""
+    unmatched = list(candidate)
+    ious, conf_deltas = [], []
+    for ref in reference:
+        best, best_iou = None, 0.5
+        for obj in unmatched:
+            iou = box_iou(ref['bbox'], obj['bbox'])
+            if obj['class'] == ref['class'] and iou >= best_iou:
+                best, best_iou = obj, iou
+        if best is not None:
+            unmatched.remove(best)
+            ious.append(best_iou)
+            conf_deltas.append(abs(best['confidence'] - ref['confidence']))
+    return {
+        'recall': len(ious) / len(reference) if reference else 1.0,
+        'extra': len(unmatched),
+        'mean_iou': float(np.mean(ious)) if ious else None,
+        'max_conf_delta': float(np.max(conf_deltas)) if conf_deltas else None,
+    }
+
+
+def mean_latency_ms(detector, image, repeats):
+    detector.detect_objects(image)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        detector.detect_objects(image)
+    return (time.perf_counter() - start) / repeats * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='yolov8n.pt')
+    parser.add_argument('--image', default='test.jpg')
+    parser.add_argument('--variants', nargs='+', default=['onnx', 'onnx-int8'], choices=list(VARIANTS))
+    parser.add_argument('--export-dir', default='models')
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    image = cv2.imread(args.image)
+    if image is None:
+        raise SystemExit(f"Could not read {args.image}")
+    images = synthetic_images(image)
+
+    reference = YOLOObjectDetector(args.model)
+    reference_outputs = {name: reference.detect_objects(img)['objects'] for name, img in images.items()}
+    reference_ms = mean_latency_ms(reference, image, args.repeats)
+    print(f"\npytorch: {reference_ms:.1f} ms/image on {args.image}")
+
+    for variant in args.variants:
+        backend, int8 = VARIANTS[variant]
+        detector = YOLOObjectDetector(args.model, backend=backend, int8=int8, export_dir=args.export_dir)
+        latency = mean_latency_ms(detector, image, args.repeats)
+
+        print(f"\n{variant}: {latency:.1f} ms/image ({reference_ms / latency:.2f}x vs pytorch)")
+        for name, img in images.items():
+            output = detector.detect_objects(img)
+            assert set(output) == {'objects', 'categories'}, "output format differs from pytorch"
+            parity = compare(reference_outputs[name], output['objects'])
+            print(f"  {name:>10}: recall={parity['recall']:.2f} extra={parity['extra']} "
+                  f"mean_iou={parity['mean_iou']} max_conf_delta={parity['max_conf_delta']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+# benchmarks/bench_frame_transfer.py
+"""
+Compare per-frame transfer cost between processes.
+
+A producer process sends frames to a consumer process either through a
+multiprocessing.Queue (frames are pickled and copied) or through a
+SharedFrameRing (frames are written once into shared memory and read in
+place). Reports producer and consumer CPU time per frame, which leaves
+out time spent blocked waiting for the other side.
+
+Usage:
+    python -m benchmarks.bench_frame_transfer [--frames 300] [--shape 720 1280 3]
+"""
+import argparse
+import multiprocessing as mp
+import time
+
+import numpy as np
+
+from ml_model.frame_ring import SharedFrameRing
+
+
+def queue_producer(q, shape, num_frames, report):
+    frame = np.random.default_rng(0).integers(0, 255, size=shape, dtype=np.uint8)
+    start = time.process_time()
+    for i in range(num_frames):
+        frame[0, 0, 0] = i % 256
+        q.put(frame)
+        time.sleep(0.001)  # Pace the writer like a camera would
+    report.put(('producer', (time.process_time() - start) / num_frames))
+    q.put(None)
+
+
+def queue_consumer(q, report):
+    count, checksum = 0, 0
+    start = time.process_time()
+    while True:
+        frame = q.get()
+        if frame is None:
+            break
+        checksum = int(frame[0, 0, 0])
+        count += 1
+    report.put(('consumer', (time.process_time() - start) / max(count, 1), count, checksum))
+
+
+def ring_producer(ring, shape, num_frames, report, done):
+    frame = np.random.default_rng(0).integers(0, 255, size=shape, dtype=np.uint8)
+    start = time.process_time()
+    for i in range(num_frames):
+        frame[0, 0, 0] = i % 256
+        ring.write(frame)
+        time.sleep(0.001)  # Pace the writer like a camera would
+    report.put(('producer', (time.process_time() - start) / num_frames))
+    done.set()
+    ring.close()
+
+
+def ring_consumer(ring, report, done):
+    count, checksum = 0, 0
+    start = time.process_time()
+    while True:
+        finished = done.is_set()
+        frame_id, frame = ring.claim(timeout=0.05)
+        if frame is None:
+            if finished:
+                break
+            continue
+        checksum = int(frame[0, 0, 0])
+        frame = None
+        ring.release(frame_id)
+        count += 1
+    report.put(('consumer', (time.process_time() - start) / max(count, 1), count, checksum))
+    ring.close()
+
+
+def run(kind, shape, num_frames):
+    ctx = mp.get_context('spawn')
+    report = ctx.Queue()
+    if kind == 'queue':
+        q = ctx.Queue(maxsize=8)
+        procs = [ctx.Process(target=queue_producer, args=(q, shape, num_frames, report)),
+                 ctx.Process(target=queue_consumer, args=(q, report))]
+        ring = None
+    else:
+        ring = SharedFrameRing(shape, slots=8, lock=ctx.Lock())
+        done = ctx.Event()
+        procs = [ctx.Process(target=ring_producer, args=(ring, shape, num_frames, report, done)),
+                 ctx.Process(target=ring_consumer, args=(ring, report, done))]
+
+    start = time.perf_counter()
+    for p in procs:
+        p.start()
+    results = dict(r[:1] + (r[1:],) for r in (report.get() for _ in procs))
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - start
+    if ring is not None:
+        ring.close()
+    return results['producer'][0], results['consumer'][0], results['consumer'][1], elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--shape', type=int, nargs=3, default=[720, 1280, 3])
+    args = parser.parse_args()
+
+    print(f"{'transport':>10} {'producer us':>12} {'consumer us':>12} {'frames seen':>12}")
+    for kind in ('queue', 'ring'):
+        producer, consumer, seen, _ = run(kind, tuple(args.shape), args.frames)
+        print(f"{kind:>10} {producer * 1e6:>12.0f} {consumer * 1e6:>12.0f} {seen:>12}")
+
+
+if __name__ == '__main__':
+    main()
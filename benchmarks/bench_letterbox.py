@@ -0,0 +1,61 @@
+# benchmarks/bench_letterbox.py
+"""
+Per-image cost of letterboxing a batch for the detector.
+
+Compares ImageProcessor._standardize_image (a new canvas per image), the
+ultralytics predictor preprocessing (LetterBox, stack, then tensor
+conversion) and ImageProcessor.letterbox_batch writing into its reusable
+buffer, both as a uint8 NHWC batch and as the float NCHW model input.
+
+Usage:
+    python -m benchmarks.bench_letterbox [--batch 8] [--size 720 1280]
+"""
+import argparse
+import time
+
+import numpy as np
+import torch
+from ultralytics.data.augment import LetterBox
+
+from ml_model.process_image import ImageProcessor
+
+
+def ultralytics_preprocess(images, letterbox):
+    """What the predictor does for a list of BGR arrays"""
+    batch = np.stack([letterbox(image=image) for image in images])
+    tensor = torch.from_numpy(batch).permute(0, 3, 1, 2).flip(1).contiguous()
+    return tensor.float().div_(255)
+
+
+def time_call(fn, repeats):
+    fn()  # Warm up (and let reusable buffers allocate)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--size', type=int, nargs=2, default=[720, 1280], metavar=('HEIGHT', 'WIDTH'))
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    processor = ImageProcessor()
+    letterbox = LetterBox((640, 640), auto=True, stride=32)
+    rng = np.random.default_rng(0)
+
+    print(f"{'batch':>6} {'standardize':>12} {'ultralytics':>12} {'nhwc uint8':>11} {'nchw float':>11}  (ms per image)")
+    for size in args.batch:
+        images = [rng.integers(0, 255, size=(*args.size, 3), dtype=np.uint8) for _ in range(size)]
+        legacy = time_call(lambda: np.stack([processor._standardize_image(i) for i in images]), args.repeats)
+        ultra = time_call(lambda: ultralytics_preprocess(images, letterbox), args.repeats)
+        nhwc = time_call(lambda: processor.letterbox_batch(images, layout='nhwc', dtype=np.uint8, rgb=False),
+                         args.repeats)
+        nchw = time_call(lambda: torch.from_numpy(processor.letterbox_batch(images, auto=True)[0]), args.repeats)
+        print(f"{size:>6} {legacy / size:>12.2f} {ultra / size:>12.2f} {nhwc / size:>11.2f} {nchw / size:>11.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+# benchmarks/bench_startup.py
+"""
+Measure API startup time and resident memory.
+
+Imports backend.api.main in a fresh interpreter (which builds every
+module-level component) and reports the import time and peak RSS. With
+--load-models the transformers pipelines are then loaded as well, which
+shows the cost that lazy loading keeps off the startup path.
+
+Usage:
+    python -m benchmarks.bench_startup [--load-models] [--runs 3]
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+CHILD = """
+import json, resource, time
+start = time.perf_counter()
+import backend.api.main
+result = {'import_seconds': time.perf_counter() - start}
+result['rss_after_import_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+if {load_models}:
+    from ml_model.model_provider import default_provider
+    start = time.perf_counter()
+    default_provider.warm().join()
+    result['model_load_seconds'] = time.perf_counter() - start
+    result['rss_after_models_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print('RESULT ' + json.dumps(result))
+"""
+
+
+def run_once(load_models):
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD.replace('{load_models}', str(load_models))],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    line = next(l for l in output.splitlines() if l.startswith('RESULT '))
+    return json.loads(line[len('RESULT '):])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--load-models', action='store_true', help='Also load every transformers pipeline')
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    for run in range(1, args.runs + 1):
+        result = run_once(args.load_models)
+        print(f"run {run}: " + ", ".join(f"{k}={v:.2f}" for k, v in result.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -102,83 +102,90 @@ class EduScopeApp:
             self.process_image(camera_input, enable_hints, challenge_mode)
             
     def process_image(self, image_data, enable_hints=False, challenge_mode=False):
-        """Process image through API"""
+        """Process image through API, rendering results as they stream in"""
         try:
             with st.spinner("Processing image..."):
                 files = {"file": image_data.getvalue()}
-                response = requests.post(f"{self.API_URL}/detect/image", files=files)
-                
+                response = requests.post(
+                    f"{self.API_URL}/detect/image",
+                    files=files,
+                    params={"stream": "ndjson"},
+                    stream=True
+                )
+
                 if response.status_code != 200:
                     st.error(f"API Error: {response.status_code}")
                     return
 
-                result = response.json()
-                
-                # Display detected objects
-                if result and "objects" in result:
-                    st.subheader("📦 Detected Components")
-                    detected_objects = []
-                    for obj in result["objects"]:
-                        confidence = obj.get("confidence", 0) * 100
-                        st.write(f"- {obj['class']} (Confidence: {confidence:.1f}%)")
-                        detected_objects.append(obj['class'])
-
-                    if detected_objects:
+                content_tab = projects_tab = None
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    event = json.loads(line)
+
+                    if event["type"] == "detections":
+                        # Display detected objects
+                        if not event.get("objects"):
+                            st.warning("No objects detected. Try adjusting the image or angle.")
+                            return
+                        st.subheader("📦 Detected Components")
+                        for obj in event["objects"]:
+                            confidence = obj.get("confidence", 0) * 100
+                            st.write(f"- {obj['class']} (Confidence: {confidence:.1f}%)")
+
                         # Create tabs for different content types
-                        tab1, tab2 = st.tabs(["Learning Content", "Project Ideas"])
-                        
-                        with tab1:
-                            if "learning_content" in result:
-                                content = result["learning_content"]
-                                if "learning_modules" in content:
-                                    for domain, module in content["learning_modules"].items():
-                                        with st.expander(f"📚 {domain.title()}", expanded=True):
-                                            if "overview" in module:
-                                                st.markdown(module["overview"])
-                                            if "safety" in module:
-                                                st.warning(module["safety"])
-                                            if "instructions" in module:
-                                                st.subheader("Instructions")
-                                                for i, step in enumerate(module["instructions"], 1):
-                                                    st.write(f"{i}. {step}")
-                                            if "tips" in module:
-                                                st.info("💡 Tips")
-                                                for tip in module["tips"]:
-                                                    st.write(f"- {tip}")
-                        
-                        with tab2:
-                            with st.spinner("Generating project ideas..."):
-                                # Get project suggestions
-                                project_data = {
-                                    "components": detected_objects,
-                                    "difficulty": "Beginner",
-                                    "team_size": 1
-                                }
-                                project_response = requests.post(
-                                    f"{self.API_URL}/projects/suggest",
-                                    json=project_data
-                                )
-                                
-                                if project_response.status_code == 200:
-                                    projects = project_response.json()
-                                    if projects:
-                                        for i, project in enumerate(projects, 1):
-                                            with st.expander(f"Project {i}: {project['title']}", expanded=i==1):
-                                                st.markdown(f"**Description:** {project['description']}")
-                                                st.markdown("**Steps:**")
-                                                for j, step in enumerate(project['steps'], 1):
-                                                    st.markdown(f"{j}. {step}")
-                                                if 'tips' in project:
-                                                    st.info("**💡 Tips:**")
-                                                    for tip in project['tips']:
-                                                        st.markdown(f"- {tip}")
-                else:
-                    st.warning("No objects detected. Try adjusting the image or angle.")
+                        content_tab, projects_tab = st.tabs(["Learning Content", "Project Ideas"])
+
+                    elif event["type"] == "learning_module" and content_tab is not None:
+                        with content_tab:
+                            self._render_learning_module(event["component"], event["module"])
+
+                    elif event["type"] == "project_suggestions" and projects_tab is not None:
+                        with projects_tab:
+                            self._render_project_list(event["project_suggestions"])
+
+                    elif event["type"] == "incomplete":
+                        st.info("Some content is still being generated. Try again shortly for the rest.")
+
+                    elif event["type"] == "error":
+                        st.error(f"Error generating content: {event['detail']}")
 
         except Exception as e:
             st.error(f"Error processing image: {str(e)}")
             print(f"Detailed error: {e}")
 
+    def _render_learning_module(self, domain, module):
+        """Render one learning module"""
+        with st.expander(f"📚 {domain.title()}", expanded=True):
+            if "overview" in module:
+                st.markdown(module["overview"])
+            if "safety" in module:
+                st.warning(module["safety"])
+            if "instructions" in module:
+                st.subheader("Instructions")
+                for i, step in enumerate(module["instructions"], 1):
+                    st.write(f"{i}. {step}")
+            if "tips" in module:
+                st.info("💡 Tips")
+                for tip in module["tips"]:
+                    st.write(f"- {tip}")
+
+    def _render_project_list(self, projects):
+        """Render project suggestions as expanders"""
+        if not projects:
+            st.warning("No project suggestions generated. Try different components.")
+            return
+        for i, project in enumerate(projects, 1):
+            with st.expander(f"Project {i}: {project['title']}", expanded=i==1):
+                st.markdown(f"**Description:** {project['description']}")
+                st.markdown("**Steps:**")
+                for j, step in enumerate(project['steps'], 1):
+                    st.markdown(f"{j}. {step}")
+                if 'tips' in project:
+                    st.info("**💡 Tips:**")
+                    for tip in project['tips']:
+                        st.markdown(f"- {tip}")
+
     def project_explorer_tab(self):
         """Project explorer interface"""
         st.header("Project Explorer")
@@ -193,9 +200,10 @@ class EduScopeApp:
                 self.process_components(camera_input, "camera")
             
         elif input_method == "Upload Image":
-            uploaded_file = st.file_uploader("Upload image", type=['jpg', 'jpeg', 'png'])
-            if uploaded_file:
-                self.process_components(uploaded_file, "upload")
+            uploaded_files = st.file_uploader("Upload images", type=['jpg', 'jpeg', 'png'],
+                                              accept_multiple_files=True)
+            if uploaded_files:
+                self.process_components(uploaded_files, "upload")
             
         else:  # Text Description
             components = st.text_input("List your components (comma-separated)")
@@ -219,7 +227,16 @@ class EduScopeApp:
         """Process components and display project suggestions"""
         try:
             with st.spinner("Analyzing components..."):
-                if input_type in ["camera", "upload"]:
+                if input_type == "upload":
+                    # All uploaded images go to the API in one request
+                    files = [("files", (f.name, f.getvalue())) for f in input_data]
+                    response = requests.post(f"{self.API_URL}/detect/images", files=files)
+                    if response.status_code == 200:
+                        components = response.json().get("classes", [])
+                    else:
+                        st.error("Failed to process images")
+                        return
+                elif input_type == "camera":
                     # Process image input
                     files = {"file": input_data.getvalue()}
                     response = requests.post(f"{self.API_URL}/detect/image", files=files)
@@ -1,13 +1,19 @@
 # backend/ml_model/advanced_features.py
-from transformers import pipeline
 from sklearn.cluster import KMeans
 import numpy as np
-import google.generativeai as genai
+from ml_model.llm_client import GeminiBackend, LLMClient
+from ml_model.model_provider import default_provider
 
 class AdvancedAIFeatures:
-    def __init__(self):
-        self.emotion_detector = pipeline("text-classification", model="j-hartmann/emotion-english-distilroberta-base")
-        self.style_transfer = pipeline("text2text-generation", model="facebook/bart-large")
+    def __init__(self, provider=None):
+        """Register the emotion and style models; they load on first use"""
+        provider = provider or default_provider
+        self.emotion_detector = provider.pipeline(
+            "emotion", "text-classification", model="j-hartmann/emotion-english-distilroberta-base"
+        )
+        self.style_transfer = provider.pipeline(
+            "style_transfer", "text2text-generation", model="facebook/bart-large"
+        )
         
     def analyze_learning_style(self, user_interactions):
         """Analyze user's learning style based on interactions"""
@@ -51,9 +57,10 @@ class AdvancedAIFeatures:
         return self._create_learning_sequence(topics, user_level)
 
 class AIGameMaster:
-    def __init__(self):
+    def __init__(self, provider=None):
         """Initialize AI-powered gaming elements"""
-        self.challenge_generator = pipeline("text-generation", model="gpt2")
+        provider = provider or default_provider
+        self.challenge_generator = provider.pipeline("challenge", "text-generation", model="gpt2")
         
     def create_educational_challenge(self, topic, materials):
         """Create an educational challenge based on available materials"""
@@ -85,10 +92,11 @@ class AIGameMaster:
         return tasks
 
 class InteractiveTutor:
-    def __init__(self):
-        """Initialize interactive tutoring system"""
-        self.model = genai.GenerativeModel("gemini-pro")
-        self.qa_model = pipeline("question-answering")
+    def __init__(self, provider=None, llm=None):
+        """Initialize interactive tutoring system; `llm` is the shared LLMClient (Gemini by default)"""
+        provider = provider or default_provider
+        self.model = (llm or LLMClient(GeminiBackend())).model("gemini-pro")
+        self.qa_model = provider.pipeline("qa", "question-answering")
         
     def provide_hints(self, question, context, num_hints=3):
         """Provide progressive hints for a question"""
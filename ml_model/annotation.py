@@ -0,0 +1,145 @@
+# ml_model/annotation.py
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# name -> (file extension, quality flag, media type)
+ENCODINGS = {
+    'jpeg': ('.jpg', cv2.IMWRITE_JPEG_QUALITY, 'image/jpeg'),
+    'webp': ('.webp', cv2.IMWRITE_WEBP_QUALITY, 'image/webp'),
+}
+
+
+def iter_boxes(detections):
+    """Yield (class, confidence, bbox, track_id) from either detection output format"""
+    if detections.get('format') == 'columnar':
+        for name, confidence, bbox in zip(detections['classes'], detections['confidences'], detections['bboxes']):
+            yield name, confidence, bbox, None
+    else:
+        for obj in detections.get('objects', []):
+            yield obj['class'], obj['confidence'], obj['bbox'], obj.get('track_id')
+
+
+def draw_detections(image, detections, color=(0, 255, 0), thickness=2, font_scale=0.5):
+    """
+    Draw bounding boxes and labels directly onto an image
+    Args:
+        image: numpy array (BGR format), modified in place
+        detections: Detection dict in 'objects' or 'columnar' format
+    Returns:
+        numpy array: The same image
+    """
+    for name, confidence, bbox, track_id in iter_boxes(detections):
+        x1, y1, x2, y2 = [int(v) for v in bbox]
+        cv2.rectangle(image, (x1, y1), (x2, y2), color, thickness)
+
+        # Add label with confidence
+        label = f"{name} {confidence:.2f}"
+        if track_id is not None:
+            label = f"#{track_id} {label}"
+        cv2.putText(image, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, font_scale, color, thickness)
+    return image
+
+
+class Annotator:
+    def __init__(self, color=(0, 255, 0), thickness=2, font_scale=0.5):
+        """
+        Draws detections, optionally into a caller-owned buffer, and encodes results
+        Args:
+            color: Box and label color (BGR)
+            thickness: Line thickness
+            font_scale: Label font scale
+        """
+        self.color = color
+        self.thickness = thickness
+        self.font_scale = font_scale
+
+        self._lock = threading.Lock()
+        self._totals = {'annotate': 0.0, 'copy': 0.0, 'encode': 0.0, 'encoded_bytes': 0}
+        self._counts = {'annotate': 0, 'copy': 0, 'encode': 0}
+
+    def annotate(self, image, detections, in_place=False, out=None):
+        """
+        Draw detections onto an image
+        Args:
+            image: numpy array (BGR format)
+            detections: Detection dict in 'objects' or 'columnar' format
+            in_place: Draw on `image` itself
+            out: Caller-owned array of the same shape and dtype to copy into and draw on,
+                 avoiding a new allocation per frame
+        Returns:
+            numpy array: The annotated image; a new copy unless in_place or out is given
+        """
+        start = time.perf_counter()
+        if in_place:
+            target = image
+        elif out is not None:
+            np.copyto(out, image)
+            target = out
+        else:
+            target = image.copy()
+        copied = time.perf_counter()
+
+        if detections:
+            draw_detections(target, detections, self.color, self.thickness, self.font_scale)
+
+        done = time.perf_counter()
+        with self._lock:
+            self._totals['annotate'] += done - start
+            self._counts['annotate'] += 1
+            if not in_place:
+                self._totals['copy'] += copied - start
+                self._counts['copy'] += 1
+        return target
+
+    def encode(self, image, fmt='jpeg', quality=80, max_side=None):
+        """
+        Encode an image for sending to clients
+        Args:
+            image: numpy array (BGR format)
+            fmt: 'jpeg' or 'webp'
+            quality: Encoder quality, 1-100
+            max_side: Downscale so the longer side is at most this many pixels
+        Returns:
+            bytes: Encoded image
+        """
+        if fmt not in ENCODINGS:
+            raise ValueError(f"Unsupported encoding: {fmt}")
+        extension, quality_flag, _ = ENCODINGS[fmt]
+
+        start = time.perf_counter()
+        height, width = image.shape[:2]
+        if max_side and max(height, width) > max_side:
+            scale = max_side / max(height, width)
+            # INTER_AREA is slow at non-integer ratios; linear is fine for mild reductions
+            interpolation = cv2.INTER_LINEAR if scale > 0.5 else cv2.INTER_AREA
+            image = cv2.resize(image, (max(1, round(width * scale)), max(1, round(height * scale))),
+                               interpolation=interpolation)
+        ok, encoded = cv2.imencode(extension, image, [quality_flag, int(quality)])
+        if not ok:
+            raise ValueError(f"Could not encode image as {fmt}")
+
+        data = encoded.tobytes()
+        with self._lock:
+            self._totals['encode'] += time.perf_counter() - start
+            self._totals['encoded_bytes'] += len(data)
+            self._counts['encode'] += 1
+        return data
+
+    def stats(self):
+        """Mean per-frame annotate, copy and encode cost"""
+        with self._lock:
+            def mean_ms(name):
+                return self._totals[name] / self._counts[name] * 1000.0 if self._counts[name] else 0.0
+
+            return {
+                'frames_annotated': self._counts['annotate'],
+                'frames_encoded': self._counts['encode'],
+                'annotate_ms': mean_ms('annotate'),
+                'copy_ms': mean_ms('copy'),
+                'encode_ms': mean_ms('encode'),
+                'encoded_kb': self._totals['encoded_bytes'] / self._counts['encode'] / 1024
+                if self._counts['encode'] else 0.0,
+            }
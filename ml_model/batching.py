@@ -0,0 +1,170 @@
+# ml_model/batching.py
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+from ml_model.process_image import ImageProcessor
+
+
+class _BatchRequest:
+    __slots__ = ('image', 'output_format', 'future', 'enqueued_at')
+
+    def __init__(self, image, output_format):
+        self.image = image
+        self.output_format = output_format
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class BatchingDetector:
+    def __init__(self, detector, max_batch_size=8, max_wait_ms=10.0, latency_window=1000, letterbox=False):
+        """
+        Gather concurrent detection requests into batched forward passes
+        Args:
+            detector: YOLOObjectDetector instance shared by all callers, or a list of
+                      instances to run that many batches in parallel (one thread each)
+            max_batch_size: Largest number of images sent to the model at once
+            max_wait_ms: Longest time a request waits for others to join its batch,
+                         which bounds the queueing delay added to p99 latency
+            latency_window: Number of recent requests kept for latency percentiles
+            letterbox: Letterbox each batch into a reusable buffer (ImageProcessor.letterbox_batch)
+                       instead of letting the model allocate its own input per image
+        """
+        self.detectors = list(detector) if isinstance(detector, (list, tuple)) else [detector]
+        self.detector = self.detectors[0]
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.letterbox = letterbox
+
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=latency_window)
+        self._batches = 0
+        self._requests = 0
+        self._errors = 0
+
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._run, args=(d,), name=f'yolo-batcher-{i}', daemon=True)
+            for i, d in enumerate(self.detectors)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def taxonomy(self):
+        return self.detector.taxonomy
+
+    def submit(self, image, output_format='objects'):
+        """
+        Queue an image for detection
+        Args:
+            image: numpy array (BGR format)
+            output_format: Format passed to the detector's _process_results
+        Returns:
+            concurrent.futures.Future: Resolves to the detector's _process_results output
+        """
+        if not self._running:
+            raise RuntimeError("BatchingDetector has been shut down")
+        request = _BatchRequest(image, output_format)
+        self._queue.put(request)
+        return request.future
+
+    def detect_objects(self, image, output_format='objects'):
+        """Blocking drop-in replacement for YOLOObjectDetector.detect_objects"""
+        return self.submit(image, output_format).result()
+
+    def shutdown(self):
+        """Stop the scheduler threads once queued requests are served"""
+        if self._running:
+            self._running = False
+            for _ in self._threads:
+                self._queue.put(None)
+            for thread in self._threads:
+                thread.join()
+
+    def _run(self, detector):
+        """Scheduler loop: collect a batch, run it on this thread's detector, repeat"""
+        # Letterbox buffers are reused between batches, so each thread owns one
+        processor = ImageProcessor() if self.letterbox else None
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+
+            batch = [first]
+            deadline = first.enqueued_at + self.max_wait
+            stop = False
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    # Once the window has passed, only take what is already queued
+                    item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._run_batch(detector, batch, processor)
+            if stop:
+                break
+
+    def _run_batch(self, detector, batch, processor=None):
+        """Run one forward pass and hand each caller its own result"""
+        batch = [r for r in batch if r.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        try:
+            if processor is not None:
+                tensor, meta = processor.letterbox_batch([r.image for r in batch], auto=True)
+                results = [
+                    detector._process_letterboxed(result, info, r.output_format)
+                    for r, result, info in zip(batch, detector.predict_preprocessed(tensor), meta)
+                ]
+            else:
+                results = [
+                    detector._process_results(result, r.output_format)
+                    for r, result in zip(batch, detector.predict([r.image for r in batch]))
+                ]
+        except Exception as e:
+            print(f"⚠️ Batched detection error: {e}")
+            for r in batch:
+                r.future.set_exception(e)
+            with self._stats_lock:
+                self._errors += len(batch)
+            return
+
+        done = time.monotonic()
+        for r, result in zip(batch, results):
+            r.future.set_result(result)
+
+        with self._stats_lock:
+            self._batches += 1
+            self._requests += len(batch)
+            self._latencies.extend(done - r.enqueued_at for r in batch)
+
+    def stats(self):
+        """Return batching and latency metrics"""
+        with self._stats_lock:
+            latencies = np.array(self._latencies) * 1000.0
+            stats = {
+                'batches': self._batches,
+                'requests': self._requests,
+                'errors': self._errors,
+                'mean_batch_size': self._requests / self._batches if self._batches else 0.0,
+                'queue_depth': self._queue.qsize(),
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000.0,
+                'workers': len(self.detectors),
+            }
+        if latencies.size:
+            stats['latency_p50_ms'] = float(np.percentile(latencies, 50))
+            stats['latency_p99_ms'] = float(np.percentile(latencies, 99))
+        return stats
@@ -1,82 +1,123 @@
-import google.generativeai as genai
 from PIL import Image
 import json
+import re
+import threading
+import time
+import copy
 import numpy as np
 import cv2
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from ml_model.llm_client import GeminiBackend, LLMClient
+from ml_model.single_flight import SingleFlight
 from ml_model.web_scraper import WebScraper
 
+def merge_content_event(result, event):
+    """Fold one iter_learning_content event into a learning-content dict"""
+    if event["type"] == "learning_module":
+        result["learning_modules"][event["component"]] = event["module"]
+    elif event["type"] == "project_suggestions":
+        result["project_suggestions"] = event["project_suggestions"]
+    elif event["type"] == "incomplete":
+        result["incomplete"] = event["incomplete"]
+    return result
+
+
+def content_events(result):
+    """Replay a finished learning-content dict as iter_learning_content events"""
+    for component, module in result.get("learning_modules", {}).items():
+        yield {"type": "learning_module", "component": component, "module": module}
+    yield {"type": "project_suggestions", "project_suggestions": result.get("project_suggestions", [])}
+    if result.get("incomplete"):
+        yield {"type": "incomplete", "incomplete": result["incomplete"]}
+
+
 class ContentGenerator:
-    def __init__(self, api_key):
-        """Initialize Gemini content generator"""
-        genai.configure(api_key=api_key)
-        self.text_model = genai.GenerativeModel('gemini-pro')
-        self.vision_model = genai.GenerativeModel('gemini-pro-vision')
-        self.scraper = WebScraper()
-
-    def generate_learning_content(self, detections):
-        """Generate comprehensive learning content based on detected objects"""
-        try:
-            detected_classes = list(set(obj["class"] for obj in detections.get("objects", [])))
-            print(f"📢 Detected Components: {detected_classes}")
+    # Bump when the module prompt or parser changes so stored modules are regenerated
+    MODULE_PROMPT_VERSION = "module-v1"
+    PROJECT_PROMPT_VERSION = "projects-v1"
 
-            # Create learning modules for each detected object
-            learning_modules = {}
-            
-            for component in detected_classes:
-                # Get basic information about the component
-                info = self.scraper.scrape_info(component)
-                
-                # Generate learning module
-                prompt = f"""
-                Create a detailed learning module about {component}. Include:
-                1. Overview and basic concepts
-                2. Safety considerations (if applicable)
-                3. Step-by-step instructions for basic usage
-                4. Practical tips and best practices
-                
-                Basic information: {info}
-                """
-                
-                response = self.text_model.generate_content(prompt)
-                if response and hasattr(response, "text"):
-                    learning_modules[component] = self._parse_module_content(response.text)
+    MODULE_INSTRUCTIONS = """Include:
+        1. Overview and basic concepts
+        2. Safety considerations (if applicable)
+        3. Step-by-step instructions for basic usage
+        4. Practical tips and best practices"""
+
+    # Delimiters of each module in a batched reply
+    MODULE_START = re.compile(r'^\W*MODULE:\s*(.+?)\W*$', re.IGNORECASE | re.MULTILINE)
+    MODULE_END = re.compile(r'^\W*END MODULE\W*$', re.IGNORECASE | re.MULTILINE)
 
-            # Generate project suggestions using the separate method
-            project_suggestions = self.generate_project_suggestions(
-                components=detected_classes,
-                difficulty="beginner",  # You can make this parameterable
-                team_size=1  # You can make this parameterable
-            )
+    def __init__(self, api_key, store=None, text_model_name='gemini-pro', max_concurrency=8, request_timeout=30.0,
+                 scraper=None, batch_prompts=False, handle_ttl_seconds=3600, max_handles=1024, llm=None):
+        """
+        Initialize Gemini content generator
+        Args:
+            api_key: Gemini API key
+            store: Optional ContentStore used to reuse generated learning modules
+            text_model_name: Gemini model used for text generation
+            max_concurrency: Scraping/LLM calls in flight at once, shared by all requests
+            request_timeout: Default whole-request deadline in seconds (None waits forever)
+            scraper: WebScraper used for background information, defaults to live Wikipedia
+            batch_prompts: Ask for all uncached modules of a request in one delimited prompt,
+                           falling back to per-component prompts for anything it misses
+            handle_ttl_seconds: How long generated project suggestions stay registered under
+                                their content handle for follow-up requests
+            max_handles: Number of registered suggestion sets kept in memory
+            llm: Shared LLMClient; defaults to a Gemini client of its own
+        """
+        self.llm = llm or LLMClient(GeminiBackend(api_key), model_name=text_model_name,
+                                    max_concurrency=max_concurrency, timeout=request_timeout)
+        self.text_model_name = text_model_name
+        # Stored content is keyed by backend too, so local stand-in text is never served as Gemini output
+        self.store_model = f"{self.llm.backend.name}:{text_model_name}"
+        self.text_model = self.llm.model(text_model_name)
+        self.vision_model = self.llm.model('gemini-pro-vision')
+        self.scraper = scraper or WebScraper()
+        self.store = store
+        self.request_timeout = request_timeout
+        self.batch_prompts = batch_prompts
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='content')
+        # Identical concurrent requests (a class photographing the same kit) share one generation
+        self._flights = SingleFlight()
+        # Recently generated project suggestions by content handle, so follow-up
+        # requests (/projects/suggest after /detect/image) reuse them without a store
+        self.handle_ttl_seconds = handle_ttl_seconds
+        self.max_handles = max_handles
+        self._handles = OrderedDict()
 
+        self._stats_lock = threading.Lock()
+        self._stats = {'module_prompts': 0, 'batched_prompts': 0, 'batched_modules': 0, 'batch_fallbacks': 0,
+                       'project_prompts': 0, 'project_handle_hits': 0}
+
+    def generate_learning_content(self, detections, force_refresh=False, timeout=None, difficulty="beginner",
+                                  team_size=1):
+        """
+        Generate comprehensive learning content based on detected objects
+        Concurrent calls for the same set of classes share one generation.
+        Args:
+            detections: Detector output ('objects' or 'columnar' format)
+            force_refresh: Regenerate learning modules and projects even if they are stored
+            timeout: Whole-request deadline in seconds, defaults to request_timeout.
+                     Parts still running at the deadline are left out and listed
+                     under "incomplete"; their LLM calls give up at the deadline too.
+            difficulty, team_size: Parameters of the project suggestions
+        """
+        key = ('learning',) + self.project_key(self.detected_classes(detections), difficulty, team_size) + (
+            force_refresh, timeout)
+        return self._flights.do(key, self._generate_learning_content, detections, force_refresh, timeout,
+                                difficulty, team_size)
+
+    def _generate_learning_content(self, detections, force_refresh, timeout, difficulty, team_size):
+        try:
             result = {
-                "learning_modules": learning_modules,
-                "project_suggestions": project_suggestions
+                "learning_modules": {},
+                "project_suggestions": []
             }
+            for event in self.iter_learning_content(detections, force_refresh, timeout, difficulty, team_size):
+                merge_content_event(result, event)
 
-            # Debug output
-            print("\n📚 Generated Learning Modules:")
-            for component, module in result["learning_modules"].items():
-                print(f"\n{component}:")
-                for section, content in module.items():
-                    print(f"- {section}: {content[:100]}...")
-
-            print("\n🚀 Generated Projects:")
-            for i, project in enumerate(result["project_suggestions"], 1):
-                print(f"\nProject {i}:")
-                print(f"Title: {project.get('title')}")
-                print(f"Description: {project.get('description')}")
-                print(f"Components: {', '.join(project.get('components', []))}")
-                print(f"Time: {project.get('estimated_time')}")
-                print("Steps:")
-                for step in project.get('steps', []):
-                    print(f"- {step}")
-                print("Learning Outcomes:")
-                for outcome in project.get('learning_outcomes', []):
-                    print(f"- {outcome}")
-                print("Tips:")
-                for tip in project.get('tips', []):
-                    print(f"- {tip}")
-
+            print(f"📚 Generated {len(result['learning_modules'])} learning modules "
+                  f"and {len(result['project_suggestions'])} projects")
             return result
 
         except Exception as e:
@@ -86,6 +127,244 @@ class ContentGenerator:
                 "project_suggestions": []
             }
 
+    def iter_learning_content(self, detections, force_refresh=False, timeout=None, difficulty="beginner", team_size=1):
+        """
+        Generate learning content as a stream of events, each yielded as soon as it is ready
+        Yields:
+            dict: {"type": "learning_module", "component", "module"} per component,
+                  {"type": "project_suggestions", "project_suggestions"} once, and
+                  {"type": "incomplete", "incomplete"} if the deadline cut anything off
+        Closing the generator early cancels the calls that have not started yet.
+        """
+        detected_classes = self.detected_classes(detections)
+        print(f"📢 Detected Components: {detected_classes}")
+
+        # The whole-request deadline is passed on to every LLM call, so calls cut
+        # off as incomplete give up their rate-limit tokens and slots
+        deadline = self.request_timeout if timeout is None else timeout
+        deadline_at = None if deadline is None else time.monotonic() + deadline
+
+        # Each future maps to (kind, components): "module" and "info" cover one
+        # component, "batch" several, "projects" none
+        futures = {}
+        uncached = []
+        if self.batch_prompts and len(detected_classes) > 1:
+            for component in detected_classes:
+                module = None if force_refresh else self._stored_module(component)
+                if module is not None:
+                    yield {"type": "learning_module", "component": component, "module": module}
+                else:
+                    uncached.append(component)
+            if len(uncached) > 1:
+                # Background lookups run concurrently; one prompt follows once all are in
+                for component in uncached:
+                    futures[self._executor.submit(self.scraper.scrape_info, component)] = ("info", [component])
+            else:
+                for component in uncached:
+                    futures[self._executor.submit(self.generate_module, component, True, deadline_at)] = (
+                        "module", [component])
+        else:
+            # Create learning modules for each detected object concurrently
+            for component in detected_classes:
+                futures[self._executor.submit(self.generate_module, component, force_refresh, deadline_at)] = (
+                    "module", [component])
+
+        # Project suggestions are generated alongside the modules
+        projects_future = self._executor.submit(
+            self.generate_project_suggestions,
+            components=detected_classes,
+            difficulty=difficulty,
+            team_size=team_size,
+            force_refresh=force_refresh,
+            deadline=deadline_at
+        )
+        futures[projects_future] = ("projects", [])
+
+        pending = set(futures)
+        infos = {}
+        try:
+            while pending:
+                remaining = None if deadline_at is None else max(0.0, deadline_at - time.monotonic())
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                if not done:
+                    incomplete = []
+                    for future in pending:
+                        future.cancel()  # Only drops calls that have not started yet
+                        kind, components = futures[future]
+                        incomplete.extend(components if kind != "projects" else ["project_suggestions"])
+                    print(f"⚠️ Content deadline of {deadline}s reached, missing: {incomplete}")
+                    yield {"type": "incomplete", "incomplete": incomplete}
+                    return
+
+                for future in done:
+                    kind, components = futures[future]
+                    if kind == "projects":
+                        yield {"type": "project_suggestions", "project_suggestions": future.result()}
+                        continue
+
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"⚠️ Learning module error for {', '.join(components)}: {e}")
+                        result = None
+
+                    if kind == "info":
+                        infos[components[0]] = result or ""
+                        if len(infos) == len(uncached):
+                            batch = self._executor.submit(self._generate_modules_batched, infos, deadline_at)
+                            futures[batch] = ("batch", list(infos))
+                            pending.add(batch)
+                    elif kind == "batch":
+                        modules = result or {}
+                        for component, module in modules.items():
+                            yield {"type": "learning_module", "component": component, "module": module}
+                        missing = [c for c in components if c not in modules]
+                        if missing:
+                            print(f"⚠️ Batched prompt missed {missing}, generating them individually")
+                            self._count('batch_fallbacks', len(missing))
+                        for component in missing:
+                            retry = self._executor.submit(self.generate_module, component, True, deadline_at)
+                            futures[retry] = ("module", [component])
+                            pending.add(retry)
+                    elif result is not None:
+                        yield {"type": "learning_module", "component": components[0], "module": result}
+        finally:
+            # Also reached when the caller stops iterating early: drop calls that have not started
+            for future in pending:
+                future.cancel()
+
+    @staticmethod
+    def normalize_components(components):
+        """Order- and case-insensitive key for a list of component names"""
+        return tuple(sorted({str(component).strip().lower() for component in components}))
+
+    @classmethod
+    def project_key(cls, components, difficulty, team_size):
+        """Normalized (components, difficulty, team_size) identifying a set of project suggestions"""
+        return cls.normalize_components(components), str(difficulty).strip().lower(), int(team_size or 1)
+
+    @classmethod
+    def content_handle(cls, components, difficulty, team_size):
+        """String form of project_key, under which project suggestions are registered and stored"""
+        names, level, size = cls.project_key(components, difficulty, team_size)
+        return f"{'|'.join(names)}:{level}:{size}"
+
+    @staticmethod
+    def detected_classes(detections):
+        """Unique class names from either detection output format"""
+        if detections.get("format") == "columnar":
+            return list(set(detections.get("classes", [])))
+        return list(set(obj["class"] for obj in detections.get("objects", [])))
+
+    def _stored_module(self, component):
+        if self.store is None:
+            return None
+        return self.store.get('module', component.strip().lower(), self.MODULE_PROMPT_VERSION, self.store_model)
+
+    def _store_module(self, component, module):
+        if self.store is not None:
+            self.store.put('module', component.strip().lower(), self.MODULE_PROMPT_VERSION,
+                           self.store_model, module)
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def generate_module(self, component, force_refresh=False, deadline=None):
+        """
+        Learning module for one component, served from the content store when possible
+        Args:
+            deadline: Absolute time.monotonic() deadline passed on to the LLM call
+        """
+        key = ('module', component.strip().lower(), force_refresh)
+        return self._flights.do(key, self._build_module, component, force_refresh, deadline)
+
+    def _build_module(self, component, force_refresh, deadline):
+        if not force_refresh:
+            module = self._stored_module(component)
+            if module is not None:
+                return module
+
+        # Get basic information about the component
+        info = self.scraper.scrape_info(component)
+
+        # Generate learning module
+        prompt = f"""
+        Create a detailed learning module about {component}. {self.MODULE_INSTRUCTIONS}
+
+        Basic information: {info}
+        """
+
+        self._count('module_prompts')
+        response = self.text_model.generate_content(prompt, deadline=deadline)
+        if not response or not hasattr(response, "text"):
+            return None
+
+        module = self._parse_module_content(response.text)
+        self._store_module(component, module)
+        return module
+
+    def _generate_modules_batched(self, infos, deadline=None):
+        """
+        Learning modules for several components from a single prompt
+        Args:
+            infos: component -> background information
+            deadline: Absolute time.monotonic() deadline passed on to the LLM call
+        Returns:
+            dict: component -> module for every module that parsed; callers
+                  regenerate the rest individually
+        """
+        components = "\n\n".join(f"Component: {component}\nBasic information: {info}"
+                                  for component, info in infos.items())
+        prompt = f"""
+        Create a detailed learning module for each component below. {self.MODULE_INSTRUCTIONS}
+
+        Start each module with a line "MODULE: <component name>" and end it with
+        a line "END MODULE". Write the modules in the order given.
+
+        {components}
+        """
+
+        self._count('batched_prompts')
+        response = self.text_model.generate_content(prompt, deadline=deadline)
+        if not response or not hasattr(response, "text"):
+            return {}
+
+        modules = self._parse_batched_modules(response.text, list(infos))
+        self._count('batched_modules', len(modules))
+        for component, module in modules.items():
+            self._store_module(component, module)
+        return modules
+
+    def _parse_batched_modules(self, text, components):
+        """
+        Split a batched reply into per-component modules
+        Returns:
+            dict: component -> _parse_module_content output, only for components whose
+                  section was found and has content
+        """
+        wanted = {component.strip().lower(): component for component in components}
+        modules = {}
+        starts = list(self.MODULE_START.finditer(text))
+        for i, match in enumerate(starts):
+            component = wanted.get(match.group(1).strip().lower())
+            if component is None or component in modules:
+                continue
+            body_end = starts[i + 1].start() if i + 1 < len(starts) else len(text)
+            end = self.MODULE_END.search(text, match.end(), body_end)
+            module = self._parse_module_content(text[match.end():end.start() if end else body_end])
+            if module["overview"].strip() or module["instructions"]:
+                modules[component] = module
+        return modules
+
+    def stats(self):
+        """LLM prompt counts, including batched prompts and their fallbacks, and request coalescing"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats['project_handles'] = len(self._handles)
+        stats['coalescing'] = self._flights.stats()
+        return stats
+
     def _parse_module_content(self, text):
         """Parse AI response into structured module content"""
         sections = {
@@ -119,8 +398,29 @@ class ContentGenerator:
         
         return sections
 
-    def generate_project_suggestions(self, components, difficulty, team_size):
-        """Generate project suggestions based on components"""
+    def generate_project_suggestions(self, components, difficulty, team_size, force_refresh=False, deadline=None):
+        """
+        Generate project suggestions based on components
+        Suggestions are registered and stored under their content handle, the normalized
+        (components, difficulty, team_size) key, so any later request with the same
+        parameters reuses them; identical concurrent calls share one generation.
+        `deadline` is an absolute time.monotonic() deadline passed on to the LLM call.
+        """
+        key = ('projects',) + self.project_key(components, difficulty, team_size) + (force_refresh,)
+        return self._flights.do(key, self._generate_project_suggestions, components, difficulty, team_size,
+                                force_refresh, deadline)
+
+    def _generate_project_suggestions(self, components, difficulty, team_size, force_refresh, deadline):
+        handle = self.content_handle(components, difficulty, team_size)
+        if not force_refresh:
+            projects = self._registered_projects(handle)
+            if projects is None and self.store is not None:
+                projects = self.store.get('projects', handle, self.PROJECT_PROMPT_VERSION, self.store_model)
+                if projects:
+                    self._register_projects(handle, projects)
+            if projects:
+                return projects
+
         try:
             prompt = f"""
             Create 2 {difficulty} projects using: {', '.join(components)}
@@ -149,17 +449,43 @@ class ContentGenerator:
             [Same format as above]
             """
 
-            response = self.text_model.generate_content(prompt)
+            self._count('project_prompts')
+            response = self.text_model.generate_content(prompt, deadline=deadline)
             
             if not response or not hasattr(response, "text"):
                 raise ValueError("Empty AI response")
 
-            return self._parse_project_suggestions(response.text)
+            projects = self._parse_project_suggestions(response.text)
+            if projects:
+                self._register_projects(handle, projects)
+                if self.store is not None:
+                    self.store.put('projects', handle, self.PROJECT_PROMPT_VERSION, self.store_model, projects)
+            return projects
 
         except Exception as e:
             print(f"⚠️ Project generation error: {e}")
             return []
 
+    def _registered_projects(self, handle):
+        """A copy of the suggestions registered under a content handle, or None"""
+        with self._stats_lock:
+            entry = self._handles.get(handle)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._handles[handle]
+                return None
+            self._handles.move_to_end(handle)
+            self._stats['project_handle_hits'] += 1
+            return copy.deepcopy(entry[1])
+
+    def _register_projects(self, handle, projects):
+        with self._stats_lock:
+            self._handles[handle] = (time.monotonic() + self.handle_ttl_seconds, copy.deepcopy(projects))
+            self._handles.move_to_end(handle)
+            while len(self._handles) > self.max_handles:
+                self._handles.popitem(last=False)
+
     def _parse_project_suggestions(self, text):
         """Parse AI response into structured project suggestions"""
         projects = []
@@ -0,0 +1,122 @@
+# ml_model/content_store.py
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class ContentStore:
+    def __init__(self, path='data/content_store.db', ttl_seconds=7 * 24 * 3600, max_entries=5000):
+        """
+        Disk-backed store for generated content
+        Args:
+            path: SQLite database file
+            ttl_seconds: Age after which an entry is regenerated
+            max_entries: Size bound; least recently used entries are evicted beyond it
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS content (
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                model_name TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (kind, key, prompt_version, model_name)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS content_accessed ON content (accessed_at)")
+        self._conn.commit()
+
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, kind, key, prompt_version, model_name):
+        """
+        Fetch stored content
+        Args:
+            kind: Content type, e.g. 'module'
+            key: Normalized content key, e.g. the component name
+            prompt_version: Version of the prompt that produced the content
+            model_name: LLM that produced the content
+        Returns:
+            The stored JSON value, or None if missing or expired
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, created_at FROM content "
+                "WHERE kind = ? AND key = ? AND prompt_version = ? AND model_name = ?",
+                (kind, key, prompt_version, model_name),
+            ).fetchone()
+
+            if row is None or now - row[1] > self.ttl_seconds:
+                self._misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE content SET accessed_at = ? "
+                "WHERE kind = ? AND key = ? AND prompt_version = ? AND model_name = ?",
+                (now, kind, key, prompt_version, model_name),
+            )
+            self._conn.commit()
+            self._hits += 1
+            return json.loads(row[0])
+
+    def put(self, kind, key, prompt_version, model_name, value):
+        """Store a JSON-serializable value, evicting old entries if over the size bound"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO content VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kind, key, prompt_version, model_name, json.dumps(value), now, now),
+            )
+            self._conn.execute(
+                "DELETE FROM content WHERE rowid IN ("
+                "SELECT rowid FROM content ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def invalidate(self, kind=None, key=None):
+        """Delete entries so they are regenerated; no arguments clears the store"""
+        clauses, params = [], []
+        if kind is not None:
+            clauses.append("kind = ?")
+            params.append(kind)
+        if key is not None:
+            clauses.append("key = ?")
+            params.append(key)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            deleted = self._conn.execute(f"DELETE FROM content{where}", params).rowcount
+            self._conn.commit()
+        return deleted
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM content").fetchone()[0]
+            lookups = self._hits + self._misses
+            return {
+                'entries': entries,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': self._hits / lookups if lookups else 0.0,
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
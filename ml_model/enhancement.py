@@ -0,0 +1,256 @@
+# ml_model/enhancement.py
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+
+_NOISE_KERNEL = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+
+
+def decode_image(contents):
+    """
+    Decode uploaded image bytes
+    Args:
+        contents: Raw bytes of an encoded image (JPEG, PNG, ...)
+    Returns:
+        numpy array: Decoded image (BGR format)
+    """
+    nparr = np.frombuffer(contents, np.uint8)
+    image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Uploaded image could not be decoded.")
+    return image
+
+
+def estimate_image_stats(image):
+    """
+    Estimate noise and exposure from cheap image statistics
+    Args:
+        image: numpy array (BGR format)
+    Returns:
+        dict: noise_sigma, brightness, contrast, dark_fraction, bright_fraction
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    # Immerkaer noise estimate; the median keeps edges from inflating it
+    response = cv2.filter2D(gray.astype(np.float32), -1, _NOISE_KERNEL)
+    noise_sigma = 1.4826 * float(np.median(np.abs(response[1:-1, 1:-1]))) / 6.0
+
+    hist = cv2.calcHist([gray], [0], None, [256], [0, 256]).ravel()
+    total = hist.sum()
+    levels = np.arange(256, dtype=np.float64)
+    brightness = float((hist * levels).sum() / total)
+    contrast = float(np.sqrt((hist * (levels - brightness) ** 2).sum() / total))
+
+    return {
+        'noise_sigma': noise_sigma,
+        'brightness': brightness,
+        'contrast': contrast,
+        'dark_fraction': float(hist[:16].sum() / total),
+        'bright_fraction': float(hist[240:].sum() / total),
+    }
+
+
+class DenoiseStage:
+    name = 'denoise'
+
+    def __init__(self, noise_low=2.5, noise_high=7.0, force=None):
+        """
+        Pick a denoising tier per image from its estimated noise level
+        Args:
+            noise_low: Below this sigma the image is left untouched ('none')
+            noise_high: Below this sigma a bilateral filter is enough ('fast'),
+                        above it full non-local means runs ('full')
+            force: Always use this tier instead of choosing one
+        """
+        self.noise_low = noise_low
+        self.noise_high = noise_high
+        self.force = force
+
+    def choose(self, stats):
+        """Select the tier for an image"""
+        if self.force:
+            return self.force
+        if stats['noise_sigma'] < self.noise_low:
+            return 'none'
+        if stats['noise_sigma'] < self.noise_high:
+            return 'fast'
+        return 'full'
+
+    def apply(self, image, stats):
+        tier = self.choose(stats)
+        if tier == 'fast':
+            image = cv2.bilateralFilter(image, 5, 50, 50)
+        elif tier == 'full':
+            image = cv2.fastNlMeansDenoisingColored(image, None, 10, 10, 7, 21)
+        elif tier != 'none':
+            raise ValueError(f"Unsupported denoise tier: {tier}")
+        return image, tier
+
+
+class ExposureStage:
+    name = 'exposure'
+
+    def __init__(self, dark_level=90, low_contrast=40, force=None):
+        """
+        Equalize and brighten only under-exposed or flat images
+        Args:
+            dark_level: Mean luminance below which the image counts as under-exposed
+            low_contrast: Luminance standard deviation below which CLAHE is applied
+            force: 'clahe' or 'none' to skip the decision
+        """
+        self.dark_level = dark_level
+        self.low_contrast = low_contrast
+        self.force = force
+
+    def choose(self, stats):
+        """Select the exposure correction for an image"""
+        if self.force:
+            return self.force
+        if stats['brightness'] < self.dark_level or stats['contrast'] < self.low_contrast:
+            return 'clahe'
+        return 'none'
+
+    def apply(self, image, stats):
+        tier = self.choose(stats)
+        if tier == 'clahe':
+            lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
+            l, a, b = cv2.split(lab)
+            clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8, 8))
+            cl = clahe.apply(l)
+            enhanced = cv2.merge((cl, a, b))
+            image = cv2.cvtColor(enhanced, cv2.COLOR_LAB2BGR)
+
+            # Adjust brightness and contrast
+            alpha = 1.2  # Contrast control
+            beta = 10    # Brightness control
+            image = cv2.convertScaleAbs(image, alpha=alpha, beta=beta)
+        elif tier != 'none':
+            raise ValueError(f"Unsupported exposure tier: {tier}")
+        return image, tier
+
+
+class EnhancementPipeline:
+    def __init__(self, stages=None):
+        """
+        Ordered chain of enhancement stages
+        Args:
+            stages: Objects with a `name` and an `apply(image, stats)` method
+                    returning (image, chosen_tier); defaults to adaptive
+                    denoising followed by exposure correction
+        """
+        self.stages = stages if stages is not None else [DenoiseStage(), ExposureStage()]
+
+    def add_stage(self, stage):
+        """Append a custom stage to the pipeline"""
+        self.stages.append(stage)
+        return self
+
+    def run(self, image):
+        """
+        Enhance an image
+        Returns:
+            tuple: (enhanced image, report with chosen tiers and per-stage timings)
+        """
+        start = time.perf_counter()
+        stats = estimate_image_stats(image)
+        timings = {'analyze': (time.perf_counter() - start) * 1000.0}
+        tiers = {}
+
+        for stage in self.stages:
+            stage_start = time.perf_counter()
+            image, tiers[stage.name] = stage.apply(image, stats)
+            timings[stage.name] = (time.perf_counter() - stage_start) * 1000.0
+
+        timings['total'] = (time.perf_counter() - start) * 1000.0
+        return image, {
+            'tier': tiers.get('denoise', 'none'),
+            'stages': tiers,
+            'stats': stats,
+            'timings_ms': timings,
+        }
+
+
+def create_enhancement_pipeline(mode='adaptive'):
+    """
+    Build an enhancement pipeline
+    Args:
+        mode: 'adaptive' chooses tiers per image, 'full' always runs NLM + CLAHE
+              (the original behaviour), 'none' disables enhancement
+    """
+    if mode == 'adaptive':
+        return EnhancementPipeline()
+    elif mode == 'full':
+        return EnhancementPipeline([DenoiseStage(force='full'), ExposureStage(force='clahe')])
+    elif mode == 'none':
+        return EnhancementPipeline([])
+    else:
+        raise ValueError(f"Unsupported enhancement mode: {mode}")
+
+
+class EnhancementMetrics:
+    def __init__(self):
+        """Aggregate enhancement reports returned by the worker pool"""
+        self._lock = threading.Lock()
+        self._tiers = {}
+
+    def record(self, report):
+        with self._lock:
+            entry = self._tiers.setdefault(report['tier'], {'count': 0, 'total_ms': 0.0})
+            entry['count'] += 1
+            entry['total_ms'] += report['timings_ms']['total']
+
+    def stats(self):
+        """Per-tier image counts and mean enhancement time"""
+        with self._lock:
+            return {
+                tier: {
+                    'count': entry['count'],
+                    'mean_ms': entry['total_ms'] / entry['count'],
+                }
+                for tier, entry in self._tiers.items()
+            }
+
+
+def preprocess_upload(contents, pipeline=None):
+    """
+    Decode and enhance an uploaded image; runs inside a worker pool
+    Returns:
+        tuple: (enhanced image, enhancement report)
+    """
+    pipeline = pipeline or create_enhancement_pipeline()
+    return pipeline.run(decode_image(contents))
+
+
+def _init_worker():
+    """Keep each worker single-threaded so the pool does not oversubscribe cores"""
+    cv2.setNumThreads(1)
+
+
+def create_preprocess_executor(kind='process', max_workers=None):
+    """
+    Create a bounded executor for CPU-heavy preprocessing
+    Args:
+        kind: 'process' for a process pool, 'thread' for a thread pool
+              (OpenCV releases the GIL, so threads also scale across cores)
+        max_workers: Worker count, defaults to the number of CPUs
+    Returns:
+        concurrent.futures.Executor
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    if kind == 'process':
+        # spawn avoids forking a parent that already holds torch/OpenCV threads
+        return ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+        )
+    elif kind == 'thread':
+        return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='preprocess')
+    else:
+        raise ValueError(f"Unsupported executor kind: {kind}")
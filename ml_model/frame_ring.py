@@ -0,0 +1,233 @@
+# ml_model/frame_ring.py
+import multiprocessing as mp
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Metadata header (int64): latest frame ID, last claimed ID, claimed count,
+# torn count, writer-closed flag
+_LATEST, _CLAIMED, _CLAIM_COUNT, _TORN, _CLOSED = range(5)
+_HEADER = 5
+
+
+class SharedFrameRing:
+    def __init__(self, shape, slots=8, lock=None, name=None):
+        """
+        Fixed-shape uint8 frame ring in shared memory
+        One writer publishes frames; any number of readers in other processes
+        claim the newest frame and use it in place, without pickling or copying.
+        Each slot carries a sequence number (odd while being written, 2 * frame ID
+        once complete), so a reader can tell if its frame was overwritten.
+        Args:
+            shape: Frame shape, e.g. (720, 1280, 3)
+            slots: Number of frames kept; a claimed frame stays valid while fewer
+                   than `slots` newer frames have been written
+            lock: multiprocessing lock guarding claims (created if omitted)
+            name: Attach to an existing ring instead of creating one
+        """
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.lock = lock if lock is not None else mp.Lock()
+        self._owner = name is None
+
+        frame_bytes = int(np.prod(self.shape))
+        meta_bytes = (_HEADER + slots) * 8 + slots * 8
+        if self._owner:
+            self._data_shm = shared_memory.SharedMemory(create=True, size=frame_bytes * slots)
+            self._meta_shm = shared_memory.SharedMemory(create=True, size=meta_bytes)
+        else:
+            self._data_shm = shared_memory.SharedMemory(name=name[0])
+            self._meta_shm = shared_memory.SharedMemory(name=name[1])
+
+        self._frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self._data_shm.buf)
+        self._meta = np.ndarray(_HEADER + slots, dtype=np.int64, buffer=self._meta_shm.buf)
+        self._times = np.ndarray(slots, dtype=np.float64, buffer=self._meta_shm.buf,
+                                 offset=(_HEADER + slots) * 8)
+        if self._owner:
+            self._meta[:] = 0
+            self._times[:] = 0.0
+
+    @property
+    def name(self):
+        return self._data_shm.name, self._meta_shm.name
+
+    def __getstate__(self):
+        # Child processes attach to the same segments by name
+        return {'shape': self.shape, 'slots': self.slots, 'lock': self.lock, 'name': self.name}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    # Writer side
+
+    def begin_write(self):
+        """
+        Reserve the next slot for writing
+        Returns:
+            tuple: (frame ID, writable view of the slot)
+        """
+        frame_id = int(self._meta[_LATEST]) + 1
+        slot = frame_id % self.slots
+        self._meta[_HEADER + slot] = 2 * frame_id - 1
+        return frame_id, self._frames[slot]
+
+    def commit(self, frame_id):
+        """Publish a frame filled after begin_write"""
+        slot = frame_id % self.slots
+        self._times[slot] = time.monotonic()
+        self._meta[_HEADER + slot] = 2 * frame_id
+        self._meta[_LATEST] = frame_id
+
+    def write(self, frame):
+        """Copy a frame into the ring and publish it"""
+        frame_id, view = self.begin_write()
+        np.copyto(view, frame)
+        self.commit(frame_id)
+        return frame_id
+
+    def close_writer(self):
+        """Mark the stream as finished so readers stop once it is drained"""
+        self._meta[_CLOSED] = 1
+
+    # Reader side
+
+    @property
+    def writer_closed(self):
+        return bool(self._meta[_CLOSED])
+
+    def latest(self):
+        """
+        Newest complete frame, without claiming it
+        Returns:
+            tuple: (frame ID, read-only view), or (0, None) before the first frame
+        """
+        frame_id = int(self._meta[_LATEST])
+        return frame_id, self.view(frame_id)
+
+    def claim(self, timeout=None):
+        """
+        Claim the newest frame not yet claimed by any reader
+        Frames published while readers were busy are skipped.
+        Args:
+            timeout: Seconds to wait for a new frame (None waits forever)
+        Returns:
+            tuple: (frame ID, read-only view), or (0, None) on timeout or once
+                   the writer has closed and every frame was claimed
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.lock:
+                frame_id = int(self._meta[_LATEST])
+                if frame_id > self._meta[_CLAIMED]:
+                    self._meta[_CLAIMED] = frame_id
+                    self._meta[_CLAIM_COUNT] += 1
+                    view = self.view(frame_id)
+                    if view is not None:
+                        return frame_id, view
+            if self.writer_closed or (deadline is not None and time.monotonic() >= deadline):
+                return 0, None
+            time.sleep(0.001)
+
+    def view(self, frame_id):
+        """Read-only view of a frame if its slot still holds it, else None"""
+        if frame_id <= 0 or not self.is_current(frame_id):
+            return None
+        view = self._frames[frame_id % self.slots]
+        view.flags.writeable = False
+        return view
+
+    def is_current(self, frame_id):
+        """Whether a frame's slot has not been reused since it was written"""
+        return self._meta[_HEADER + frame_id % self.slots] == 2 * frame_id
+
+    def release(self, frame_id):
+        """
+        Finish reading a claimed frame
+        Returns:
+            bool: False if the writer overwrote the frame while it was in use
+        """
+        if self.is_current(frame_id):
+            return True
+        with self.lock:
+            self._meta[_TORN] += 1
+        return False
+
+    def frame_time(self, frame_id):
+        """Monotonic time at which a frame was published"""
+        return float(self._times[frame_id % self.slots])
+
+    def stats(self):
+        written = int(self._meta[_LATEST])
+        claimed = int(self._meta[_CLAIM_COUNT])
+        return {
+            'slots': self.slots,
+            'frames_written': written,
+            'frames_claimed': claimed,
+            'frames_skipped': written - claimed,
+            'torn_frames': int(self._meta[_TORN]),
+            'writer_closed': self.writer_closed,
+        }
+
+    def close(self):
+        """Detach from shared memory; the creating process also frees it"""
+        self._frames = self._meta = self._times = None
+        self._data_shm.close()
+        self._meta_shm.close()
+        if self._owner:
+            self._data_shm.unlink()
+            self._meta_shm.unlink()
+
+
+def capture_process(ring, source, stop_event):
+    """Read frames from a camera or file straight into the ring"""
+    import cv2
+
+    cap = cv2.VideoCapture(source)
+    height, width = ring.shape[:2]
+    # Play files back at their native rate, like a camera would deliver them
+    fps = cap.get(cv2.CAP_PROP_FPS) if isinstance(source, str) else 0
+    interval = 1.0 / fps if fps and fps > 0 else 0.0
+    next_frame_at = time.monotonic()
+    try:
+        while not stop_event.is_set():
+            if interval:
+                next_frame_at += interval
+                time.sleep(max(0.0, next_frame_at - time.monotonic()))
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frame_id, view = ring.begin_write()
+            if frame.shape == ring.shape:
+                np.copyto(view, frame)
+            else:
+                cv2.resize(frame, (width, height), dst=view)
+            ring.commit(frame_id)
+    finally:
+        view = None  # Drop the view so the segment can be detached
+        cap.release()
+        ring.close_writer()
+        ring.close()
+
+
+def inference_process(ring, results, stop_event, model_path='yolov8n.pt', detector_kwargs=None):
+    """Run detection on claimed frames, sending (frame ID, capture time, detections) back"""
+    from ml_model.yolo_model import YOLOObjectDetector
+
+    frame = None
+    try:
+        detector = YOLOObjectDetector(model_path, **(detector_kwargs or {}))
+        while not stop_event.is_set():
+            frame_id, frame = ring.claim(timeout=0.1)
+            if frame is None:
+                if ring.writer_closed:
+                    break
+                continue
+            captured_at = ring.frame_time(frame_id)
+            detections = detector.detect_objects(frame)
+            if ring.release(frame_id):
+                results.put((frame_id, captured_at, detections))
+    finally:
+        frame = None  # Drop the view so the segment can be detached
+        results.put(None)
+        ring.close()
@@ -0,0 +1,225 @@
+# ml_model/knowledge_base.py
+"""
+Offline knowledge base used by WebScraper instead of live Wikipedia.
+
+Build it once from a Wikipedia abstract dump
+(https://dumps.wikimedia.org/enwiki/latest/enwiki-latest-abstract.xml.gz)
+and/or a local text corpus, then point KNOWLEDGE_BASE_PATH at the database:
+
+    python -m ml_model.knowledge_base build --db data/knowledge.db \\
+        --wikipedia-abstracts enwiki-latest-abstract.xml.gz --corpus notes/
+    python -m ml_model.knowledge_base lookup --db data/knowledge.db "cell_phone"
+"""
+import argparse
+import bz2
+import difflib
+import gzip
+import json
+import os
+import re
+import sqlite3
+import threading
+import xml.etree.ElementTree as ET
+
+
+def normalize_title(title):
+    """Lowercase, turn underscores into spaces and collapse whitespace"""
+    return re.sub(r'\s+', ' ', title.replace('_', ' ')).strip().lower()
+
+
+def _open_text(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    if path.endswith('.bz2'):
+        return bz2.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+def iter_wikipedia_abstracts(path):
+    """Yield (title, abstract) pairs from a Wikipedia abstract dump"""
+    with _open_text(path) as f:
+        for _, elem in ET.iterparse(f, events=('end',)):
+            if elem.tag != 'doc':
+                continue
+            title = (elem.findtext('title') or '').removeprefix('Wikipedia: ').strip()
+            abstract = (elem.findtext('abstract') or '').strip()
+            if title and abstract:
+                yield title, abstract
+            elem.clear()
+
+
+def iter_text_corpus(path):
+    """
+    Yield (title, text) pairs from a local corpus
+    Args:
+        path: A directory of .txt files (file name is the title, first paragraph
+              the text), a .tsv file of title<TAB>text lines, or a .jsonl file of
+              {"title": ..., "text": ...} objects
+    """
+    if os.path.isdir(path):
+        for root, _, files in os.walk(path):
+            for name in sorted(files):
+                if not name.endswith('.txt'):
+                    continue
+                with open(os.path.join(root, name), encoding='utf-8') as f:
+                    paragraphs = [p.strip() for p in f.read().split('\n\n') if p.strip()]
+                if paragraphs:
+                    yield os.path.splitext(name)[0], paragraphs[0]
+    elif path.endswith('.jsonl'):
+        with _open_text(path) as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record['title'], record['text']
+    else:
+        with _open_text(path) as f:
+            for line in f:
+                title, sep, text = line.rstrip('\n').partition('\t')
+                if sep and title and text:
+                    yield title, text
+
+
+class KnowledgeBase:
+    def __init__(self, path='data/knowledge.db', fuzzy_cutoff=0.6):
+        """
+        SQLite store of article abstracts with a full-text index on titles
+        Args:
+            path: Database file, created if missing
+            fuzzy_cutoff: Minimum title similarity (0-1) for a fuzzy match
+        """
+        self.path = path
+        self.fuzzy_cutoff = fuzzy_cutoff
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # Reads go through the OS page cache instead of SQLite's own buffers
+        self._conn.execute("PRAGMA mmap_size=1073741824")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                id INTEGER PRIMARY KEY,
+                title TEXT NOT NULL,
+                norm_title TEXT NOT NULL UNIQUE,
+                abstract TEXT NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                norm_title, content='articles', content_rowid='id'
+            );
+        """)
+
+    def add_articles(self, articles, batch_size=10000):
+        """
+        Insert (title, text) pairs; the first text seen for a title wins
+        Returns:
+            int: Number of articles read
+        """
+        count = 0
+        batch = []
+        with self._lock:
+            for title, text in articles:
+                batch.append((title, normalize_title(title), text))
+                count += 1
+                if len(batch) >= batch_size:
+                    self._insert(batch)
+                    batch = []
+            if batch:
+                self._insert(batch)
+            # Rebuild the external-content index over everything inserted
+            self._conn.execute("INSERT INTO articles_fts(articles_fts) VALUES('rebuild')")
+            self._conn.commit()
+        return count
+
+    def _insert(self, batch):
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO articles (title, norm_title, abstract) VALUES (?, ?, ?)", batch
+        )
+
+    def lookup(self, keyword):
+        """
+        Find the abstract for a keyword
+        Tries the normalized title, simple singular/plural variants, then the
+        closest title among full-text candidates.
+        Returns:
+            str or None
+        """
+        norm = normalize_title(keyword)
+        if not norm:
+            return None
+
+        variants = [norm, norm[:-1] if norm.endswith('s') else norm + 's']
+        with self._lock:
+            for variant in variants:
+                row = self._conn.execute(
+                    "SELECT abstract FROM articles WHERE norm_title = ?", (variant,)
+                ).fetchone()
+                if row:
+                    return row[0]
+            return self._fuzzy_lookup(norm)
+
+    def _fuzzy_lookup(self, norm):
+        tokens = re.findall(r'\w+', norm)
+        if not tokens:
+            return None
+
+        quoted = [f'"{t}"' for t in tokens]
+        candidates = []
+        # Prefer titles containing every token, then any of them
+        for query in (' AND '.join(quoted), ' OR '.join(quoted)):
+            candidates = self._conn.execute(
+                "SELECT a.norm_title, a.abstract FROM articles_fts "
+                "JOIN articles a ON a.id = articles_fts.rowid "
+                "WHERE articles_fts MATCH ? ORDER BY bm25(articles_fts) LIMIT 50",
+                (query,),
+            ).fetchall()
+            if candidates:
+                break
+
+        best, best_score = None, self.fuzzy_cutoff
+        for title, abstract in candidates:
+            score = difflib.SequenceMatcher(None, norm, title).ratio()
+            if score >= best_score:
+                best, best_score = abstract, score
+        return best
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help='Ingest sources into the knowledge base')
+    build.add_argument('--db', default='data/knowledge.db')
+    build.add_argument('--wikipedia-abstracts', action='append', default=[], metavar='DUMP')
+    build.add_argument('--corpus', action='append', default=[], metavar='PATH')
+
+    lookup = subparsers.add_parser('lookup', help='Look up a keyword')
+    lookup.add_argument('--db', default='data/knowledge.db')
+    lookup.add_argument('keyword')
+
+    args = parser.parse_args()
+    kb = KnowledgeBase(args.db)
+
+    if args.command == 'build':
+        for dump in args.wikipedia_abstracts:
+            print(f"📢 Ingesting {dump}")
+            print(f"✅ Read {kb.add_articles(iter_wikipedia_abstracts(dump))} abstracts")
+        for corpus in args.corpus:
+            print(f"📢 Ingesting {corpus}")
+            print(f"✅ Read {kb.add_articles(iter_text_corpus(corpus))} documents")
+        print(f"✅ Knowledge base has {len(kb)} articles")
+    else:
+        print(kb.lookup(args.keyword) or "⚠️ No relevant information found.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,407 @@
+# ml_model/llm_client.py
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import deque
+
+# HTTP statuses worth retrying: throttling and transient server errors
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+
+class LLMError(Exception):
+    """An LLM call failed"""
+
+
+class LLMUnavailable(LLMError):
+    """The call was not attempted: the circuit is open or the deadline passed while waiting"""
+
+
+class LLMResponse:
+    __slots__ = ('text', 'prompt_tokens', 'completion_tokens')
+
+    def __init__(self, text, prompt_tokens=0, completion_tokens=0):
+        self.text = text
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+    def __repr__(self):
+        text = self.text if len(self.text) <= 200 else self.text[:200] + '...'
+        return (f"LLMResponse(text={text!r}, prompt_tokens={self.prompt_tokens}, "
+                f"completion_tokens={self.completion_tokens})")
+
+
+def _estimate_tokens(contents):
+    """Rough token count (about 3/4 of a word each) for backends that do not report usage"""
+    if isinstance(contents, (list, tuple)):
+        return sum(_estimate_tokens(part) for part in contents if isinstance(part, str))
+    return int(len(str(contents).split()) * 4 / 3)
+
+
+class GeminiBackend:
+    name = 'gemini'
+
+    def __init__(self, api_key=None):
+        """
+        Google Gemini via google-generativeai
+        Args:
+            api_key: Configures the library when given; otherwise an earlier configure() is used
+        """
+        import google.generativeai as genai
+
+        self._genai = genai
+        if api_key:
+            genai.configure(api_key=api_key)
+        self._models = {}
+
+    def generate(self, model_name, contents, timeout):
+        model = self._models.get(model_name)
+        if model is None:
+            model = self._models[model_name] = self._genai.GenerativeModel(model_name)
+        response = model.generate_content(contents, request_options={'timeout': timeout})
+
+        usage = getattr(response, 'usage_metadata', None)
+        return LLMResponse(
+            response.text,
+            getattr(usage, 'prompt_token_count', 0) or 0,
+            getattr(usage, 'candidates_token_count', 0) or 0,
+        )
+
+    @staticmethod
+    def is_retryable(error):
+        # google.api_core errors carry the HTTP status as `code`
+        return isinstance(error, (TimeoutError, ConnectionError)) or getattr(error, 'code', None) in RETRYABLE_STATUS
+
+
+class LocalStandInBackend:
+    name = 'local'
+
+    def __init__(self, latency=0.05, failure_rate=0.0, seed=0):
+        """
+        Deterministic offline stand-in for load-testing the pipeline without an API key
+        Replies follow the formats the content parsers expect: learning modules
+        (including batched MODULE: sections), PROJECT blocks and free text.
+        Args:
+            latency: Simulated seconds per call
+            failure_rate: Fraction of calls failing with a retryable error
+            seed: Seed for the simulated failures
+        """
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def generate(self, model_name, contents, timeout):
+        if timeout is not None and self.latency > timeout:
+            time.sleep(max(0.0, timeout))
+            raise TimeoutError(f"Local stand-in exceeded {timeout:.2f}s")
+        time.sleep(self.latency)
+        if self.failure_rate:
+            with self._lock:
+                failed = self._random.random() < self.failure_rate
+            if failed:
+                raise ConnectionError("Simulated transient failure")
+
+        prompt = ' '.join(part for part in contents if isinstance(part, str)) \
+            if isinstance(contents, (list, tuple)) else str(contents)
+        text = self._reply(prompt)
+        return LLMResponse(text, _estimate_tokens(contents), _estimate_tokens(text))
+
+    def _reply(self, prompt):
+        digest = hashlib.sha1(prompt.encode('utf-8')).hexdigest()[:8]
+        if 'projects using' in prompt:
+            components = re.search(r'projects using:\s*(.+)', prompt)
+            components = components.group(1).strip() if components else 'components'
+            return '\n\n'.join(
+                f"PROJECT {i}\nTitle: {components.title()} Project {digest}-{i}\n"
+                f"Description: A hands-on activity with {components}.\nComponents: {components}\n"
+                f"Time: {15 * (i + 1)} minutes\nSteps:\n1. Gather the {components}\n2. Build the setup\n"
+                f"3. Test and record results\nLearning Outcomes:\n- How {components} work\n"
+                f"- Measuring and observing\n- Explaining results\nTips:\n- Work safely\n- Take notes"
+                for i in (1, 2)
+            )
+        components = re.findall(r'^\s*Component:\s*(.+?)\s*$', prompt, re.MULTILINE)
+        if components:
+            return '\n'.join(f"MODULE: {component}\n{self._module(component, digest)}\nEND MODULE"
+                             for component in components)
+        topic = re.search(r'learning module about (.+?)\.', prompt)
+        if topic:
+            return self._module(topic.group(1), digest)
+        return f"Local stand-in response {digest}: {prompt.strip()[:200]}"
+
+    @staticmethod
+    def _module(component, digest):
+        return (f"{component.title()} is a common object used in hands-on learning ({digest}).\n"
+                f"Safety Considerations:\nHandle the {component} with care.\n"
+                f"Instructions:\n1. Inspect the {component}\n2. Try its basic use\n3. Put it away safely\n"
+                f"Tips:\n- Start simple\n- Ask questions")
+
+    @staticmethod
+    def is_retryable(error):
+        return isinstance(error, (TimeoutError, ConnectionError))
+
+
+BACKENDS = {'gemini': GeminiBackend, 'local': LocalStandInBackend}
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        """
+        Rate limiter allowing `rate` calls per second with bursts of up to `burst`
+        Args:
+            rate: Tokens added per second (0 disables limiting)
+            burst: Bucket capacity
+        """
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline=None):
+        """
+        Take a token, waiting for one if needed
+        Returns:
+            float: Seconds waited, or None if no token is available before the deadline
+        """
+        if not self.rate:
+            return 0.0
+        start = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return now - start
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return None
+            time.sleep(wait)
+
+    def refund(self):
+        """Return a token taken for a call that was never made"""
+        if self.rate:
+            with self._lock:
+                self._tokens = min(self.burst, self._tokens + 1)
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        """
+        Stops calls after repeated failures, then lets one trial call through after a pause
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a trial call
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'open' and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+            if self.state == 'closed':
+                return True
+            if self.state == 'half_open' and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def release(self):
+        """Give back a trial call that was allowed but never made"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self.state == 'half_open' or self._failures >= self.failure_threshold:
+                if self.state != 'open':
+                    print(f"⚠️ LLM circuit opened after {self._failures} failures")
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+
+
+class LLMModel:
+    """A model name bound to an LLMClient, usable wherever a GenerativeModel was"""
+
+    def __init__(self, client, model_name):
+        self.client = client
+        self.model_name = model_name
+
+    def generate_content(self, contents, timeout=None, deadline=None):
+        return self.client.generate_content(contents, model_name=self.model_name, timeout=timeout,
+                                            deadline=deadline)
+
+
+class LLMClient:
+    def __init__(self, backend, model_name='gemini-pro', rate_per_second=5.0, burst=10, max_concurrency=8,
+                 timeout=30.0, max_retries=3, backoff=0.5, max_backoff=8.0, failure_threshold=5,
+                 reset_timeout=30.0):
+        """
+        Shared LLM client: rate limiting, bounded concurrency, deadlines, retries and a circuit breaker
+        Args:
+            backend: GeminiBackend or LocalStandInBackend
+            model_name: Default model
+            rate_per_second, burst: Token-bucket limit on calls started (0 disables)
+            max_concurrency: Calls in flight at once across all callers
+            timeout: Default per-call deadline in seconds, covering waits and retries
+            max_retries: Retries of throttled or transient failures
+            backoff, max_backoff: Base and cap in seconds of the full-jitter exponential backoff
+            failure_threshold, reset_timeout: Circuit breaker settings
+        """
+        self.backend = backend
+        self.model_name = model_name
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self._bucket = TokenBucket(rate_per_second, burst)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._random = random.Random()
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)
+        self._in_flight = 0
+        self._counts = {'calls': 0, 'succeeded': 0, 'failed': 0, 'retries': 0, 'rejected': 0, 'timed_out': 0,
+                        'prompt_tokens': 0, 'completion_tokens': 0}
+        self._rate_wait = 0.0
+
+    @classmethod
+    def from_name(cls, backend_name, api_key=None, local_latency=0.05, **kwargs):
+        """Build a client for the 'gemini' or 'local' backend"""
+        if backend_name not in BACKENDS:
+            raise ValueError(f"Unsupported LLM backend: {backend_name}")
+        backend = GeminiBackend(api_key) if backend_name == 'gemini' else LocalStandInBackend(local_latency)
+        return cls(backend, **kwargs)
+
+    def model(self, model_name=None):
+        return LLMModel(self, model_name or self.model_name)
+
+    def generate_content(self, contents, model_name=None, timeout=None, deadline=None):
+        """
+        Generate a response
+        Args:
+            contents: Prompt string, or a list of prompt parts (text and images)
+            model_name: Overrides the default model
+            timeout: Seconds for the whole call including waits and retries
+            deadline: Absolute time.monotonic() deadline from the caller; the earlier one applies
+        Returns:
+            LLMResponse: Has .text like a Gemini response, plus token counts
+        Raises:
+            LLMUnavailable: Circuit open, or no rate-limit token or slot before the deadline
+            Exception: The backend's error once retries are exhausted or it is not retryable
+        """
+        timeout = self.timeout if timeout is None else timeout
+        call_deadline = None if timeout is None else time.monotonic() + timeout
+        if deadline is not None:
+            call_deadline = deadline if call_deadline is None else min(call_deadline, deadline)
+        self._count('calls')
+
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self._count('rejected')
+                raise LLMUnavailable("LLM circuit is open after repeated failures")
+
+            waited = self._bucket.acquire(call_deadline)
+            if waited is not None and not self._slots.acquire(timeout=self._remaining(call_deadline)):
+                self._bucket.refund()
+                waited = None
+            if waited is None:
+                self.breaker.release()
+                self._count('timed_out')
+                raise LLMUnavailable("LLM deadline passed while waiting for capacity")
+
+            start = time.monotonic()
+            with self._lock:
+                self._rate_wait += waited
+                self._in_flight += 1
+            try:
+                response = self.backend.generate(model_name or self.model_name, contents,
+                                                 self._remaining(call_deadline))
+            except Exception as e:
+                error = e
+            else:
+                error = None
+            finally:
+                self._slots.release()
+                with self._lock:
+                    self._in_flight -= 1
+
+            if error is None:
+                self.breaker.record_success()
+                with self._lock:
+                    self._latencies.append(time.monotonic() - start)
+                    self._counts['succeeded'] += 1
+                    self._counts['prompt_tokens'] += response.prompt_tokens
+                    self._counts['completion_tokens'] += response.completion_tokens
+                return response
+
+            retryable = self.backend.is_retryable(error)
+            if retryable:
+                self.breaker.record_failure()
+            else:
+                # The provider answered; the request itself was bad (e.g. blocked content)
+                self.breaker.record_success()
+            delay = self._random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+            remaining = self._remaining(call_deadline)
+            if not retryable or attempt >= self.max_retries or (remaining is not None and delay >= remaining):
+                self._count('failed')
+                if isinstance(error, TimeoutError):
+                    self._count('timed_out')
+                raise error
+
+            attempt += 1
+            self._count('retries')
+            print(f"⚠️ LLM call failed ({error}), retry {attempt}/{self.max_retries} in {delay:.2f}s")
+            time.sleep(delay)
+
+    @staticmethod
+    def _remaining(deadline):
+        return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def stats(self):
+        """Call outcomes, latency percentiles, token usage and limiter state"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            counts = dict(self._counts)
+            rate_wait = self._rate_wait
+            in_flight = self._in_flight
+
+        def percentile_ms(p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000.0 if latencies else 0.0
+
+        return {
+            'backend': self.backend.name,
+            **counts,
+            'in_flight': in_flight,
+            'latency_ms': {
+                'mean': sum(latencies) / len(latencies) * 1000.0 if latencies else 0.0,
+                'p50': percentile_ms(0.5),
+                'p95': percentile_ms(0.95),
+            },
+            'rate_limit_wait_s': rate_wait,
+            'circuit': self.breaker.state,
+        }
@@ -0,0 +1,101 @@
+# ml_model/model_provider.py
+import threading
+import time
+
+
+class LazyPipeline:
+    def __init__(self, task, model=None, **kwargs):
+        """
+        transformers pipeline that is only built on first use
+        Args:
+            task: Pipeline task, e.g. 'text-classification'
+            model: Model name, or None for the task's default model
+            **kwargs: Extra arguments passed to transformers.pipeline
+        """
+        self.task = task
+        self.model = model
+        self.kwargs = kwargs
+        self._pipeline = None
+        self._lock = threading.Lock()
+        self.load_seconds = None
+
+    @property
+    def loaded(self):
+        return self._pipeline is not None
+
+    def load(self):
+        """Build the pipeline if needed and return it"""
+        if self._pipeline is None:
+            with self._lock:
+                if self._pipeline is None:
+                    # Importing transformers is itself slow, so defer it too
+                    from transformers import pipeline
+
+                    print(f"📢 Loading {self.task} pipeline ({self.model or 'default model'})")
+                    start = time.perf_counter()
+                    self._pipeline = pipeline(self.task, model=self.model, **self.kwargs)
+                    self.load_seconds = time.perf_counter() - start
+                    print(f"✅ Loaded {self.task} pipeline in {self.load_seconds:.1f}s")
+        return self._pipeline
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+    def status(self):
+        return {
+            'task': self.task,
+            'model': self.model,
+            'loaded': self.loaded,
+            'load_seconds': self.load_seconds,
+        }
+
+
+class ModelProvider:
+    def __init__(self):
+        """Registry of lazily loaded pipelines shared across features"""
+        self._pipelines = {}
+        self._lock = threading.Lock()
+
+    def pipeline(self, name, task, model=None, **kwargs):
+        """
+        Get or register a lazily loaded pipeline
+        Args:
+            name: Registry key, so several features can share one model
+            task, model, **kwargs: See LazyPipeline
+        Returns:
+            LazyPipeline: Callable like the underlying transformers pipeline
+        """
+        with self._lock:
+            if name not in self._pipelines:
+                self._pipelines[name] = LazyPipeline(task, model, **kwargs)
+            return self._pipelines[name]
+
+    def warm(self, names=None):
+        """
+        Load pipelines in a background thread
+        Args:
+            names: Pipelines to load, defaults to every registered one
+        Returns:
+            threading.Thread: The warm-up thread
+        """
+        with self._lock:
+            targets = [p for n, p in self._pipelines.items() if names is None or n in names]
+
+        def _load_all():
+            for lazy in targets:
+                try:
+                    lazy.load()
+                except Exception as e:
+                    print(f"⚠️ Failed to warm {lazy.task} pipeline: {e}")
+
+        thread = threading.Thread(target=_load_all, name='model-warmup', daemon=True)
+        thread.start()
+        return thread
+
+    def status(self):
+        """Load state of every registered pipeline"""
+        with self._lock:
+            return {name: lazy.status() for name, lazy in self._pipelines.items()}
+
+
+default_provider = ModelProvider()
@@ -0,0 +1,178 @@
+# ml_model/pregenerate.py
+"""
+Pre-generate learning content for every class the detector can emit.
+
+Enumerates the detector's class names and stores a learning module and
+project suggestions for each, plus project suggestions for the class
+combinations listed in a combos file (one pair or triple per line,
+comma-separated, e.g. "cup, spoon"). Uses the same content store and
+settings as the API, so requests are then served from stored content.
+
+Finished jobs are appended to a progress file; an interrupted run picks
+up where it stopped. Failed jobs are not recorded and are retried.
+Progress and stored content are kept per LLM backend, so a run with
+LLM_BACKEND=local neither counts as nor stands in for a Gemini run.
+
+Usage:
+    python -m ml_model.pregenerate [--model yolov8n.pt] [--combos combos.txt] [--workers 4]
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+from ml_model.content_generator import ContentGenerator
+from ml_model.content_store import ContentStore
+from ml_model.knowledge_base import KnowledgeBase
+from ml_model.llm_client import LLMClient
+from ml_model.web_scraper import WebScraper
+from ml_model.yolo_model import YOLOObjectDetector
+
+
+def read_combos(path, class_names):
+    """
+    Class combinations from a combos file
+    Returns:
+        list: Tuples of 2-3 known class names; other lines are skipped with a warning
+    """
+    known = {name.lower(): name for name in class_names}
+    combos = []
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            names = [name.strip().lower() for name in line.split(',') if name.strip()]
+            unknown = [name for name in names if name not in known]
+            if unknown or not 2 <= len(names) <= 3:
+                print(f"⚠️ Skipping {path}:{line_number}: expected 2-3 detector classes, got {line!r}")
+                continue
+            combos.append(tuple(known[name] for name in names))
+    return combos
+
+
+def build_jobs(class_names, combos, difficulties, team_size):
+    """(job id, kind, components, difficulty) for every module and project set to generate"""
+    jobs = []
+    for name in class_names:
+        jobs.append((f"module:{name.lower()}", 'module', [name], None))
+    for components in [(name,) for name in class_names] + list(combos):
+        for difficulty in difficulties:
+            handle = ContentGenerator.content_handle(components, difficulty, team_size)
+            jobs.append((f"projects:{handle}", 'projects', list(components), difficulty))
+    return jobs
+
+
+class Progress:
+    def __init__(self, path, backend):
+        """Append-only record of finished job ids; only jobs finished on `backend` count as done"""
+        self.path = path
+        self.backend = backend
+        self.done = set()
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        if record.get('backend', 'gemini') == backend:
+                            self.done.add(record['job'])
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def mark(self, job_id):
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'job': job_id, 'backend': self.backend, 'at': time.time()}) + '\n')
+            self.done.add(job_id)
+
+
+def run_job(generator, job, team_size, force_refresh):
+    """Generate (or find stored) content for one job; returns True if it succeeded"""
+    _, kind, components, difficulty = job
+    if kind == 'module':
+        return generator.generate_module(components[0], force_refresh) is not None
+    return bool(generator.generate_project_suggestions(components, difficulty, team_size, force_refresh))
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='yolov8n.pt', help='Detector weights whose class names are warmed')
+    parser.add_argument('--combos', help='File of class pairs/triples to also generate projects for')
+    parser.add_argument('--difficulty', action='append', help='Project difficulty (repeatable, default beginner)')
+    parser.add_argument('--team-size', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=4, help='Jobs generated in parallel')
+    parser.add_argument('--store', default=os.getenv("CONTENT_STORE_PATH", "data/content_store.db"))
+    parser.add_argument('--progress', default='data/pregenerate_progress.jsonl')
+    parser.add_argument('--restart', action='store_true', help='Ignore progress from earlier runs')
+    parser.add_argument('--force', action='store_true', help='Regenerate content that is already stored')
+    parser.add_argument('--limit', type=int, help='Only run this many jobs')
+    args = parser.parse_args()
+
+    api_key = os.getenv("GEMINI_API_KEY")
+    llm_backend = os.getenv("LLM_BACKEND", "gemini")
+    if not api_key and llm_backend == "gemini":
+        raise SystemExit("⚠️ ERROR: GEMINI_API_KEY is missing! Set it in .env")
+
+    class_names = list(YOLOObjectDetector(args.model).model.names.values())
+    combos = read_combos(args.combos, class_names) if args.combos else []
+    jobs = build_jobs(class_names, combos, args.difficulty or ['beginner'], args.team_size)
+
+    if args.restart and os.path.exists(args.progress):
+        os.remove(args.progress)
+    progress = Progress(args.progress, llm_backend)
+    remaining = [job for job in jobs if job[0] not in progress.done]
+    todo = remaining[:args.limit]
+    print(f"📢 {len(class_names)} classes, {len(combos)} combinations: "
+          f"{len(jobs)} jobs, {len(jobs) - len(remaining)} already done")
+
+    store = ContentStore(
+        args.store,
+        ttl_seconds=float(os.getenv("CONTENT_STORE_TTL_SECONDS", str(7 * 24 * 3600))),
+        max_entries=int(os.getenv("CONTENT_STORE_MAX_ENTRIES", "5000")),
+    )
+    if len(jobs) > store.max_entries:
+        print(f"⚠️ {len(jobs)} jobs exceed CONTENT_STORE_MAX_ENTRIES={store.max_entries}; "
+              f"older entries will be evicted")
+    knowledge_base_path = os.getenv("KNOWLEDGE_BASE_PATH")
+    scraper = WebScraper(knowledge_base=KnowledgeBase(knowledge_base_path) if knowledge_base_path else None,
+                         offline=os.getenv("OFFLINE_MODE", "0") == "1")
+    llm = LLMClient.from_name(llm_backend, api_key=api_key,
+                              rate_per_second=float(os.getenv("LLM_RATE_PER_SECOND", "5")),
+                              burst=int(os.getenv("LLM_BURST", "10")), max_concurrency=args.workers)
+    generator = ContentGenerator(api_key=api_key, store=store, max_concurrency=args.workers, scraper=scraper,
+                                 llm=llm)
+
+    start = time.monotonic()
+    failed = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(run_job, generator, job, args.team_size, args.force): job for job in todo}
+        for i, future in enumerate(as_completed(futures), 1):
+            job_id = futures[future][0]
+            try:
+                ok = future.result()
+            except Exception as e:
+                print(f"⚠️ {job_id} failed: {e}")
+                ok = False
+            if ok:
+                progress.mark(job_id)
+            else:
+                failed += 1
+            print(f"{'✅' if ok else '⚠️'} [{i}/{len(todo)}] {job_id}")
+
+    print(f"📢 LLM: {llm.stats()}")
+    print(f"📚 Finished {len(todo) - failed} jobs in {time.monotonic() - start:.0f}s"
+          f"{f', {failed} failed (rerun to retry)' if failed else ''}; store has {store.stats()['entries']} entries")
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
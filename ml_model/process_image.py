@@ -4,11 +4,15 @@ import numpy as np
 from PIL import Image
 import io
 
+from ml_model.annotation import Annotator
+
 class ImageProcessor:
     def __init__(self):
         """Initialize image processor with default parameters"""
         self.target_size = (640, 640)  # Default size for YOLO
-        
+        self._batch_buffers = {}  # (layout, dtype) -> reusable letterbox buffer
+        self.annotator = Annotator()
+
     def preprocess_image(self, image_data, source_type='bytes'):
         """
         Preprocess image for model input
@@ -62,24 +66,98 @@ class ImageProcessor:
         
         return canvas
 
-    def draw_detections(self, image, detections):
+    def letterbox_batch(self, images, layout='nchw', dtype=np.float32, rgb=True, pad_value=114,
+                        auto=False, stride=32):
+        """
+        Letterbox several images into one preallocated, reusable batch buffer
+        Each image is resized straight into its slot; only the padding bands are
+        filled, and the buffer is reused across calls (grown if a batch is larger).
+        The defaults produce the RGB, 0-1, NCHW float layout accepted by
+        YOLOObjectDetector.detect_preprocessed.
+        Args:
+            images: list of numpy arrays (BGR format)
+            layout: 'nchw' or 'nhwc'
+            dtype: np.uint8 (0-255) or np.float32 (scaled to 0-1)
+            rgb: Reorder channels from BGR to RGB
+            pad_value: Border value on the 0-255 scale (114 matches YOLO training)
+            auto: Shrink the canvas to the smallest multiple of `stride` that fits
+                  every resized image, e.g. 640x384 for 16:9 frames
+            stride: Canvas granularity when auto is set
+        Returns:
+            tuple: (batch view of the buffer, valid until the next call with the same
+                   layout and dtype; list of dicts with 'scale', 'pad' (x, y) and
+                   'shape' (original height, width) for mapping boxes back)
+        """
+        if layout not in ('nchw', 'nhwc'):
+            raise ValueError(f"Unsupported layout: {layout}")
+        dtype = np.dtype(dtype)
+        if dtype not in (np.uint8, np.float32):
+            raise ValueError(f"Unsupported dtype: {dtype}")
+
+        target_w, target_h = self.target_size
+        sizes = []
+        for image in images:
+            height, width = image.shape[:2]
+            scale = min(target_w / width, target_h / height)
+            sizes.append((scale, round(width * scale), round(height * scale)))
+        if auto and sizes:
+            target_w = min(target_w, -(-max(w for _, w, _ in sizes) // stride) * stride)
+            target_h = min(target_h, -(-max(h for _, _, h in sizes) // stride) * stride)
+
+        batch = self._batch_buffer(len(images), target_h, target_w, layout, dtype)
+
+        meta = []
+        for i, (image, (scale, new_w, new_h)) in enumerate(zip(images, sizes)):
+            x, y = (target_w - new_w) // 2, (target_h - new_h) // 2
+            meta.append({'scale': scale, 'pad': (x, y), 'shape': image.shape[:2]})
+
+            slot = batch[i] if layout == 'nhwc' else batch[i].transpose(1, 2, 0)
+            # Padding bands only; the resized image overwrites the rest
+            slot[:y] = pad_value
+            slot[y + new_h:] = pad_value
+            slot[y:y + new_h, :x] = pad_value
+            slot[y:y + new_h, x + new_w:] = pad_value
+
+            if layout == 'nhwc' and dtype == np.uint8 and not rgb:
+                region = slot[y:y + new_h, x:x + new_w]
+                cv2.resize(image, (new_w, new_h), dst=region, interpolation=cv2.INTER_LINEAR)
+                continue
+
+            resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+            if layout == 'nchw':
+                # Contiguous planes copy far faster than a strided transpose
+                planes = cv2.split(resized)
+                for c, plane in enumerate(planes[::-1] if rgb else planes):
+                    batch[i, c, y:y + new_h, x:x + new_w] = plane
+            else:
+                slot[y:y + new_h, x:x + new_w] = resized[..., ::-1] if rgb else resized
+
+        if dtype == np.float32:
+            # One in-place pass over the whole batch scales pixels and padding to 0-1
+            np.multiply(batch, 1.0 / 255.0, out=batch)
+
+        return batch, meta
+
+    def _batch_buffer(self, size, height, width, layout, dtype):
+        """Contiguous batch view over a cached flat buffer, grown when too small"""
+        shape = (size, 3, height, width) if layout == 'nchw' else (size, height, width, 3)
+        needed = int(np.prod(shape))
+        key = (layout, dtype.str)
+        buffer = self._batch_buffers.get(key)
+        if buffer is None or buffer.size < needed:
+            buffer = np.empty(needed, dtype=dtype)
+            self._batch_buffers[key] = buffer
+        return buffer[:needed].reshape(shape)
+
+    def draw_detections(self, image, detections, in_place=False, out=None):
         """
         Draw bounding boxes and labels on image
         Args:
             image: Original image
             detections: List of detected objects
+            in_place: Draw on `image` itself instead of a copy
+            out: Caller-owned buffer to draw into instead of a new copy
         Returns:
             numpy array: Image with annotations
         """
-        img_copy = image.copy()
-        
-        for obj in detections['objects']:
-            bbox = [int(x) for x in obj['bbox']]
-            cv2.rectangle(img_copy, (bbox[0], bbox[1]), (bbox[2], bbox[3]), (0, 255, 0), 2)
-            
-            # Add label with confidence
-            label = f"{obj['class']} {obj['confidence']:.2f}"
-            cv2.putText(img_copy, label, (bbox[0], bbox[1]-10), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-            
-        return img_copy
\ No newline at end of file
+        return self.annotator.annotate(image, detections, in_place=in_place, out=out)
@@ -1,21 +1,67 @@
 # ml_model/process_video.py
 import cv2
 import numpy as np
-from threading import Thread
+import multiprocessing as mp
+from threading import Thread, Condition
 import queue
 import time
 
+from ml_model.annotation import Annotator
+from ml_model.frame_ring import SharedFrameRing, capture_process, inference_process
+
+class _RateMeter:
+    def __init__(self, smoothing=0.9):
+        """Exponentially smoothed events-per-second meter"""
+        self.smoothing = smoothing
+        self.rate = 0.0
+        self._last = None
+
+    def tick(self, now=None):
+        now = time.monotonic() if now is None else now
+        if self._last is not None and now > self._last:
+            instant = 1.0 / (now - self._last)
+            self.rate = instant if self.rate == 0.0 else self.smoothing * self.rate + (1 - self.smoothing) * instant
+        self._last = now
+
 class VideoProcessor:
-    def __init__(self, buffer_size=10):
+    def __init__(self, buffer_size=10, mode='fifo', tracker=None):
         """
         Initialize video processor
         Args:
             buffer_size: Size of frame buffer for real-time processing
+            mode: 'fifo' queues every frame; 'realtime' keeps only the newest
+                  frame so detection never lags behind the camera
+            tracker: Optional ObjectTracker; frames between detector runs are
+                     filled in by the tracker and objects carry a 'track_id'
         """
+        if mode not in ('fifo', 'realtime'):
+            raise ValueError(f"Unsupported mode: {mode}")
+        self.mode = mode
+        self.tracker = tracker
+        self.annotator = Annotator()
         self.buffer_size = buffer_size
         self.frame_buffer = queue.Queue(maxsize=buffer_size)
         self.processing_active = False
-        
+
+        # Latest-frame slot used in realtime mode
+        self._frame_ready = Condition()
+        self._latest_frame = None
+        self._latest_frame_id = 0
+        self._latest_frame_time = None
+
+        # Most recent detection result, reused on frames between inferences
+        self._latest_detections = None
+        self._latest_detections_frame_id = 0
+
+        self._capture_meter = _RateMeter()
+        self._inference_meter = _RateMeter()
+        self._dropped_frames = 0
+        self._latency = None
+
+        # Shared-memory capture/inference processes (start_shared_capture)
+        self._ring = None
+        self._processes = []
+
     def start_video_capture(self, source=0):
         """
         Start video capture from camera or video file
@@ -24,40 +70,218 @@ class VideoProcessor:
         """
         self.cap = cv2.VideoCapture(source)
         self.processing_active = True
-        
+
         # Start capture thread
         self.capture_thread = Thread(target=self._capture_frames)
         self.capture_thread.daemon = True
         self.capture_thread.start()
-        
+
+    def start_realtime_detection(self, detector):
+        """
+        Start a detection worker that always processes the newest frame
+        Call start_video_capture() first; the worker stops when capture stops.
+        Args:
+            detector: YOLOObjectDetector (or BatchingDetector) instance
+        """
+        if self.mode != 'realtime':
+            raise RuntimeError("Real-time detection requires mode='realtime'")
+        if not self.processing_active:
+            raise RuntimeError("Real-time detection requires a running capture; call start_video_capture() first")
+        self.detection_thread = Thread(target=self._detection_loop, args=(detector,))
+        self.detection_thread.daemon = True
+        self.detection_thread.start()
+
+    def start_shared_capture(self, source=0, model_path='yolov8n.pt', inference_workers=2,
+                             slots=16, frame_shape=None, detector_kwargs=None):
+        """
+        Capture and detect in separate processes, passing frames through shared memory
+        The capture process writes into a SharedFrameRing; each inference process
+        claims the newest unclaimed frame and runs its own detector on it in place,
+        so capture, decode and inference use separate cores without pickling frames.
+        Args:
+            source: Camera index or video file path
+            model_path: Weights loaded by every inference process
+            inference_workers: Number of inference processes
+            slots: Frames held by the ring
+            frame_shape: (height, width, 3); probed from the source if omitted
+            detector_kwargs: Extra YOLOObjectDetector arguments (e.g. backend)
+        """
+        if frame_shape is None:
+            probe = cv2.VideoCapture(source)
+            ret, frame = probe.read()
+            probe.release()
+            if not ret:
+                raise RuntimeError(f"Could not read a frame from {source}")
+            frame_shape = frame.shape
+
+        ctx = mp.get_context('spawn')
+        self._ring = SharedFrameRing(frame_shape, slots=slots, lock=ctx.Lock())
+        self._stop_event = ctx.Event()
+        self._results = ctx.Queue()
+        self._processes = [ctx.Process(target=capture_process, args=(self._ring, source, self._stop_event))]
+        for _ in range(inference_workers):
+            self._processes.append(ctx.Process(
+                target=inference_process,
+                args=(self._ring, self._results, self._stop_event, model_path, detector_kwargs),
+            ))
+        for process in self._processes:
+            process.daemon = True
+            process.start()
+
+        self.processing_active = True
+        self._shared_started = time.monotonic()
+        self.results_thread = Thread(target=self._collect_results, args=(inference_workers,))
+        self.results_thread.daemon = True
+        self.results_thread.start()
+
+    def _collect_results(self, workers):
+        """Keep the newest detection result reported by the inference processes"""
+        finished = 0
+        while finished < workers:
+            item = self._results.get()
+            if item is None:
+                finished += 1
+                continue
+            frame_id, captured_at, detections = item
+            if frame_id < self._latest_detections_frame_id:
+                continue  # A slower worker finished an older frame
+            now = time.monotonic()
+            self._latest_detections = detections
+            self._latest_detections_frame_id = frame_id
+            self._latency = now - captured_at
+            self._inference_meter.tick(now)
+        self.processing_active = False
+
     def stop_video_capture(self):
         """Stop video capture and release resources"""
         self.processing_active = False
+        if self._ring is not None:
+            self._stop_event.set()
+            self.results_thread.join(timeout=10)
+            for process in self._processes:
+                process.join(timeout=10)
+            self._ring.close()
+            self._ring = None
+            self._processes = []
+        with self._frame_ready:
+            self._frame_ready.notify_all()
         if hasattr(self, 'capture_thread'):
             self.capture_thread.join()
+        if hasattr(self, 'detection_thread'):
+            self.detection_thread.join()
         if hasattr(self, 'cap'):
             self.cap.release()
-            
+
     def _capture_frames(self):
         """Continuously capture frames and add to buffer"""
         while self.processing_active:
-            if not self.frame_buffer.full():
+            if self.mode == 'realtime':
+                ret, frame = self.cap.read()
+                if not ret:
+                    self.processing_active = False
+                    break
+                self._publish_frame(frame)
+            elif not self.frame_buffer.full():
                 ret, frame = self.cap.read()
                 if ret:
                     self.frame_buffer.put(frame)
+                    self._capture_meter.tick()
                 else:
                     self.processing_active = False
                     break
             else:
                 time.sleep(0.01)  # Small delay to prevent CPU overload
-                
+
+        with self._frame_ready:
+            self._frame_ready.notify_all()
+
+    def _publish_frame(self, frame):
+        """Replace the latest-frame slot, waking the detection worker"""
+        now = time.monotonic()
+        with self._frame_ready:
+            self._latest_frame = frame
+            self._latest_frame_id += 1
+            self._latest_frame_time = now
+            self._frame_ready.notify()
+        self._capture_meter.tick(now)
+
+    def _detection_loop(self, detector):
+        """Detect on the newest frame, skipping any captured while the last inference ran"""
+        last_id = 0
+        while True:
+            with self._frame_ready:
+                while self.processing_active and self._latest_frame_id == last_id:
+                    self._frame_ready.wait()
+                if self._latest_frame_id == last_id:
+                    break  # Capture stopped and nothing new arrived
+                frame = self._latest_frame
+                frame_id = self._latest_frame_id
+                captured_at = self._latest_frame_time
+
+            if last_id:
+                self._dropped_frames += frame_id - last_id - 1
+            last_id = frame_id
+
+            try:
+                detections = self._detect(frame, detector)
+            except Exception as e:
+                print(f"⚠️ Real-time detection error: {e}")
+                continue
+
+            now = time.monotonic()
+            self._latest_detections = detections
+            self._latest_detections_frame_id = frame_id
+            self._latency = now - captured_at
+            self._inference_meter.tick(now)
+
     def get_frame(self):
-        """Get the next frame from buffer"""
+        """Get the next frame from buffer (the newest frame in realtime or shared mode)"""
+        if self._ring is not None:
+            _, frame = self._ring.latest()
+            return frame.copy() if frame is not None else None
+        if self.mode == 'realtime':
+            with self._frame_ready:
+                return self._latest_frame
         try:
             return self.frame_buffer.get_nowait()
         except queue.Empty:
             return None
-            
+
+    def get_annotated_frame(self):
+        """
+        Newest frame annotated with the most recent detections (realtime mode)
+        Returns:
+            tuple: (annotated frame, detections), or (None, None) before the first frame
+        """
+        frame = self.get_frame()
+        if frame is None:
+            return None, None
+        detections = self._latest_detections
+        return self._draw_detections(frame, detections), detections
+
+    def get_stats(self):
+        """Capture/inference throughput, dropped frames and end-to-end latency"""
+        stats = {
+            'capture_fps': self._capture_meter.rate,
+            'inference_fps': self._inference_meter.rate,
+            'dropped_frames': self._dropped_frames,
+            'latency_ms': self._latency * 1000.0 if self._latency is not None else None,
+            'detections_age_frames': self._latest_frame_id - self._latest_detections_frame_id
+            if self._latest_detections is not None else None,
+        }
+        stats['annotation'] = self.annotator.stats()
+        if self.tracker is not None:
+            stats['tracking'] = self.tracker.stats()
+        if self._ring is not None:
+            ring_stats = self._ring.stats()
+            elapsed = time.monotonic() - self._shared_started
+            stats['capture_fps'] = ring_stats['frames_written'] / elapsed if elapsed > 0 else 0.0
+            stats['dropped_frames'] = ring_stats['frames_skipped']
+            if self._latest_detections is not None:
+                stats['detections_age_frames'] = ring_stats['frames_written'] - self._latest_detections_frame_id
+            stats['shared_ring'] = ring_stats
+        return stats
+
     def process_frame(self, frame, detector):
         """
         Process a single frame with object detection
@@ -65,33 +289,28 @@ class VideoProcessor:
             frame: numpy array of frame
             detector: YOLOObjectDetector instance
         Returns:
-            tuple: (processed frame, detections)
+            tuple: (processed frame, detections); with a tracker, detections also
+                   carry 'new_objects' for objects first seen on this frame
         """
         if frame is None:
             return None, None
-            
+
         # Perform detection
-        detections = detector.detect_objects(frame)
-        
+        detections = self._detect(frame, detector)
+
         # Draw results
         processed_frame = self._draw_detections(frame, detections)
-        
+
         return processed_frame, detections
-        
+
+    def _detect(self, frame, detector):
+        """Run the detector, or let the tracker decide whether it is needed"""
+        if self.tracker is not None:
+            return self.tracker.step(frame, detector)
+        return detector.detect_objects(frame)
+
     def _draw_detections(self, frame, detections):
-        """Draw detection results on frame"""
-        if not detections or 'objects' not in detections:
+        """Draw detection results on a copy of the frame"""
+        if not detections:
             return frame
-            
-        frame_copy = frame.copy()
-        
-        for obj in detections['objects']:
-            bbox = [int(x) for x in obj['bbox']]
-            cv2.rectangle(frame_copy, (bbox[0], bbox[1]), (bbox[2], bbox[3]), (0, 255, 0), 2)
-            
-            # Add label with confidence
-            label = f"{obj['class']} {obj['confidence']:.2f}"
-            cv2.putText(frame_copy, label, (bbox[0], bbox[1]-10), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-            
-        return frame_copy
\ No newline at end of file
+        return self.annotator.annotate(frame, detections)
@@ -0,0 +1,166 @@
+# ml_model/result_cache.py
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+def dhash(gray, hash_size=8):
+    """
+    Difference hash of a grayscale image
+    Args:
+        gray: 2-D uint8 numpy array
+        hash_size: Hash is hash_size * hash_size bits
+    Returns:
+        int: Perceptual hash; similar images differ in few bits
+    """
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def image_hash_from_bytes(contents, hash_size=8):
+    """Perceptual hash of an encoded image, using a cheap reduced-size decode"""
+    nparr = np.frombuffer(contents, np.uint8)
+    gray = cv2.imdecode(nparr, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if gray is None or min(gray.shape) <= hash_size:
+        gray = cv2.imdecode(nparr, cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        raise ValueError("Uploaded image could not be decoded.")
+    return dhash(gray, hash_size)
+
+
+class _CacheEntry:
+    __slots__ = ('image_hash', 'value', 'size', 'expires_at')
+
+    def __init__(self, image_hash, value, size, expires_at):
+        self.image_hash = image_hash
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+
+
+class PerceptualResultCache:
+    def __init__(self, max_distance=4, max_entries=512, ttl_seconds=3600, max_bytes=64 * 1024 * 1024):
+        """
+        LRU + TTL cache of detection results keyed by perceptual image hash
+        Args:
+            max_distance: Largest Hamming distance between hashes still counted as a hit
+            max_entries: Entry limit before least recently used entries are evicted
+            ttl_seconds: Lifetime of an entry
+            max_bytes: Approximate memory cap (JSON size of stored values)
+        Uniform images (blank or covered frames) all hash to 0 whatever their
+        colour, so hash 0 is never cached.
+        """
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._hits = 0
+        self._near_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, image_hash, namespace=''):
+        """
+        Look up a result for an image hash
+        Returns:
+            tuple: (stored value, Hamming distance) or None on a miss
+        """
+        if image_hash == 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            key = (namespace, image_hash)
+            entry = self._entries.get(key)
+            distance = 0
+
+            if entry is None and self.max_distance > 0:
+                # The scan visits every entry anyway, so expired ones are dropped on the way
+                self._remove_expired(now)
+                best = None
+                for (ns, _), candidate in self._entries.items():
+                    if ns != namespace:
+                        continue
+                    d = (candidate.image_hash ^ image_hash).bit_count()
+                    if d <= self.max_distance and (best is None or d < distance):
+                        best, distance = candidate, d
+                entry = best
+                if entry is not None:
+                    key = (namespace, entry.image_hash)
+
+            if entry is not None and entry.expires_at <= now:
+                self._remove(key)
+                self._expirations += 1
+                entry = None
+
+            if entry is None:
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            if distance:
+                self._near_hits += 1
+            return entry.value, distance
+
+    def put(self, image_hash, value, namespace=''):
+        """Store a JSON-serializable result for an image hash"""
+        if image_hash == 0:
+            return
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            key = (namespace, image_hash)
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _CacheEntry(image_hash, value, size, now + self.ttl_seconds)
+            self._bytes += size
+
+            # Expired entries are dropped before any live entry is evicted
+            self._remove_expired(now)
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _remove_expired(self, now):
+        expired = [key for key, entry in self._entries.items() if entry.expires_at <= now]
+        for key in expired:
+            self._remove(key)
+        self._expirations += len(expired)
+
+    def stats(self):
+        """Hit ratio and occupancy"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self._hits,
+                'near_hits': self._near_hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'hit_ratio': self._hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,77 @@
+# ml_model/single_flight.py
+import copy
+import threading
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        """
+        Coalesces concurrent identical calls: the first caller for a key runs the
+        function, later callers with the same key wait for it and share its result
+        Keys are tuples whose first item names the kind of call, which is how the
+        counts in stats() are grouped. Nothing is kept once a call finishes;
+        stored results are the content store's job.
+        """
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._counts = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs), or wait for the identical call already in flight
+        Args:
+            key: Hashable tuple identifying the call, e.g. ('projects', components, ...)
+        Returns:
+            The function's result. When callers share a result each gets its own
+            deep copy, so one request cannot modify another's response.
+        Raises:
+            Whatever the function raised, in every waiting caller
+        """
+        with self._lock:
+            counts = self._counts.setdefault(key[0], {'calls': 0, 'executions': 0, 'coalesced': 0})
+            counts['calls'] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                counts['executions'] += 1
+            else:
+                call.waiters += 1
+                counts['coalesced'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                shared = call.waiters > 0
+            call.done.set()
+        return copy.deepcopy(call.result) if shared else call.result
+
+    def stats(self):
+        """Calls, executions and coalesced callers per kind of call, plus calls in flight"""
+        with self._lock:
+            stats = {kind: dict(counts) for kind, counts in self._counts.items()}
+            for counts in stats.values():
+                counts['coalesced_ratio'] = counts['coalesced'] / counts['calls'] if counts['calls'] else 0.0
+            stats['in_flight'] = len(self._calls)
+            return stats
@@ -0,0 +1,156 @@
+# ml_model/taxonomy.py
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(__file__), 'taxonomy.json')
+
+
+class _CompiledTaxonomy:
+    """Immutable snapshot of a loaded taxonomy; swapped whole on reload"""
+
+    def __init__(self, categories, labels, default):
+        self.categories = categories
+        self.labels = labels  # class name -> tuple of category indices
+        self.default = default
+        self.tables = {}  # id(names) -> (names, membership matrix)
+
+    def table(self, names):
+        """(num_classes, num_categories) membership matrix indexed by class id"""
+        cached = self.tables.get(id(names))
+        if cached is not None and cached[0] is names:
+            return cached[1]
+
+        num_classes = max(names) + 1 if names else 0
+        matrix = np.zeros((num_classes, len(self.categories)), dtype=bool)
+        for class_id, name in names.items():
+            matrix[class_id, list(self.labels.get(name, self.default))] = True
+        self.tables[id(names)] = (names, matrix)
+        return matrix
+
+
+class Taxonomy:
+    def __init__(self, path=DEFAULT_TAXONOMY_PATH, reload_interval=2.0):
+        """
+        Class-to-category taxonomy loaded from a JSON config
+        The config maps each category to its class names; a class may belong to
+        several categories, and classes listed nowhere get the "default" ones.
+        Lookups use a boolean class-id x category matrix, compiled once per
+        model class list.
+        Args:
+            path: JSON file with "categories" and optional "default"
+            reload_interval: Seconds between checks of the file's modification time;
+                             an edited file is picked up without a restart (0 disables)
+        """
+        self.path = path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked_at = 0.0
+        self._compiled = None
+        self._version = 0
+        self.reload()
+
+    @property
+    def categories(self):
+        return self._compiled.categories
+
+    @property
+    def version(self):
+        """Increases with every reload, picking up file edits first; cached results are keyed by it"""
+        self._current()
+        return self._version
+
+    def reload(self):
+        """
+        Re-read the config file
+        Returns:
+            dict: Summary of the loaded taxonomy
+        """
+        with self._lock:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, encoding='utf-8') as f:
+                config = json.load(f)
+
+            default = config.get('default', ['other'])
+            categories = list(config['categories'])
+            for name in default:
+                if name not in categories:
+                    categories.append(name)
+            index = {name: i for i, name in enumerate(categories)}
+
+            labels = {}
+            for category, class_names in config['categories'].items():
+                for class_name in class_names:
+                    labels.setdefault(class_name, []).append(index[category])
+
+            self._compiled = _CompiledTaxonomy(
+                tuple(categories),
+                {name: tuple(ids) for name, ids in labels.items()},
+                tuple(index[name] for name in default),
+            )
+            self._mtime = mtime
+            self._checked_at = time.monotonic()
+            self._version += 1
+
+        print(f"✅ Taxonomy loaded: {len(categories)} categories, {len(labels)} classes")
+        return {'path': self.path, 'categories': list(categories), 'classes': len(labels)}
+
+    def _current(self):
+        """The compiled taxonomy, reloading first if the file has changed"""
+        if self.reload_interval and time.monotonic() - self._checked_at >= self.reload_interval:
+            self._checked_at = time.monotonic()
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                mtime = self._mtime
+            if mtime != self._mtime:
+                try:
+                    self.reload()
+                except (OSError, ValueError, KeyError) as e:
+                    self._mtime = mtime  # Warn once per bad edit
+                    print(f"⚠️ Taxonomy reload failed, keeping the previous version: {e}")
+        return self._compiled
+
+    def categorize(self, class_ids, names):
+        """
+        Group detections by category
+        Args:
+            class_ids: Array of model class ids, one per detection
+            names: The model's {class id: class name} dict
+        Returns:
+            dict: category -> indices of the detections in that category
+        """
+        compiled = self._current()
+        membership = compiled.table(names)[np.asarray(class_ids, dtype=np.int64)]
+        return {
+            category: np.flatnonzero(membership[:, i]).tolist()
+            for i, category in enumerate(compiled.categories)
+        }
+
+    def categorize_objects(self, objects, class_ids=None, names=None):
+        """
+        Group detection dicts by category
+        Args:
+            objects: Detection dicts with a 'class' name
+            class_ids, names: Model class ids and names for the vectorized lookup;
+                              without them classes are looked up by name
+        Returns:
+            dict: category -> list of objects
+        """
+        if class_ids is not None and names is not None:
+            groups = self.categorize(class_ids, names)
+            return {category: [objects[i] for i in indices] for category, indices in groups.items()}
+
+        compiled = self._current()
+        categories = {category: [] for category in compiled.categories}
+        for obj in objects:
+            for i in compiled.labels.get(obj['class'], compiled.default):
+                categories[compiled.categories[i]].append(obj)
+        return categories
+
+
+default_taxonomy = Taxonomy()
@@ -0,0 +1,222 @@
+# ml_model/tracker.py
+import itertools
+import math
+
+import numpy as np
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """Pairwise IoU between two (N, 4) and (M, 4) arrays of xyxy boxes"""
+    if len(boxes_a) == 0 or len(boxes_b) == 0:
+        return np.zeros((len(boxes_a), len(boxes_b)), dtype=np.float32)
+    a = boxes_a[:, None, :]
+    b = boxes_b[None, :, :]
+    inter_w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    inter_h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = inter_w * inter_h
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-9)
+
+
+class KalmanBoxTrack:
+    # Constant-velocity model over (cx, cy, w, h)
+    _F = np.eye(8)
+    _F[:4, 4:] = np.eye(4)
+    _H = np.eye(4, 8)
+
+    def __init__(self, track_id, obj):
+        """
+        Track one object with a Kalman filter
+        Args:
+            track_id: Stable integer ID
+            obj: Detection dict with 'class', 'confidence' and 'bbox' (xyxy)
+        """
+        self.track_id = track_id
+        self.class_name = obj['class']
+        self.confidence = obj['confidence']
+        self.detected_confidence = obj['confidence']  # Score at the last detector match
+        self.missed = 0
+
+        self.x = np.zeros(8)
+        self.x[:4] = self._to_cxcywh(obj['bbox'])
+        self.P = np.diag([10.0, 10.0, 10.0, 10.0, 100.0, 100.0, 100.0, 100.0])
+
+    @staticmethod
+    def _to_cxcywh(bbox):
+        x1, y1, x2, y2 = bbox
+        return np.array([(x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1])
+
+    def _noise(self, scale):
+        size = max(self.x[2], self.x[3], 1.0)
+        return (scale * size) ** 2
+
+    def predict(self, confidence_decay):
+        """Advance one frame; confidence decays until a detection confirms the track"""
+        self.x = self._F @ self.x
+        self.x[2:4] = np.maximum(self.x[2:4], 1.0)
+        Q = np.diag([self._noise(0.05)] * 4 + [self._noise(0.01)] * 4)
+        self.P = self._F @ self.P @ self._F.T + Q
+        self.confidence *= confidence_decay
+
+    def update(self, obj):
+        """Correct the state with a matched detection"""
+        R = np.eye(4) * self._noise(0.05)
+        y = self._to_cxcywh(obj['bbox']) - self._H @ self.x
+        S = self._H @ self.P @ self._H.T + R
+        K = self.P @ self._H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ y
+        self.P = (np.eye(8) - K @ self._H) @ self.P
+        self.confidence = obj['confidence']
+        self.detected_confidence = obj['confidence']
+        self.missed = 0
+
+    @property
+    def bbox(self):
+        cx, cy, w, h = self.x[:4]
+        return [cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2]
+
+    def to_object(self):
+        cx, cy = self.x[:2]
+        return {
+            'class': self.class_name,
+            'confidence': float(self.confidence),
+            'bbox': [float(v) for v in self.bbox],
+            'center': [float(cx), float(cy)],
+            'track_id': self.track_id
+        }
+
+
+class ObjectTracker:
+    def __init__(self, detect_every=10, iou_threshold=0.3, max_missed=2,
+                 confidence_decay=0.9, min_confidence_ratio=0.5):
+        """
+        IoU + Kalman multi-object tracker that rations detector calls
+        Args:
+            detect_every: Run the detector at least every N frames
+            iou_threshold: Minimum IoU to match a detection to a track of the same class
+            max_missed: Detector runs a track may go unmatched before it is dropped
+            confidence_decay: Per-frame confidence multiplier for propagated tracks
+            min_confidence_ratio: Run the detector early when any track has decayed below this
+                                  fraction of its last detected score. Relative, so tracks
+                                  first seen near the detector threshold do not force detections
+        The early trigger fires after decay_horizon propagated frames (7 at the defaults),
+        so detect_every must exceed decay_horizon + 1 for it to ever come before the
+        periodic run. At the defaults tracked scenes are re-detected every 8 frames and
+        empty scenes every 10.
+        """
+        self.detect_every = max(1, detect_every)
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.confidence_decay = confidence_decay
+        self.min_confidence_ratio = min_confidence_ratio
+
+        self.tracks = []
+        self._ids = itertools.count(1)
+        self._frames_since_detection = None
+        self.frames = 0
+        self.detector_calls = 0
+
+        horizon = self.decay_horizon
+        if self.detect_every > 1 and (horizon is None or horizon + 1 >= self.detect_every):
+            print(f"⚠️ Tracker confidence trigger never fires before detect_every={self.detect_every} "
+                  f"(decay {confidence_decay}, ratio {min_confidence_ratio})")
+
+    @property
+    def decay_horizon(self):
+        """Propagated frames until a track decays below min_confidence_ratio, or None if it never does"""
+        if not 0 < self.confidence_decay < 1 or self.min_confidence_ratio <= 0:
+            return None
+        if self.min_confidence_ratio > 1:
+            return 0
+        return math.floor(math.log(self.min_confidence_ratio) / math.log(self.confidence_decay)) + 1
+
+    def needs_detection(self):
+        """Whether the next frame should run the detector"""
+        if self._frames_since_detection is None or self._frames_since_detection + 1 >= self.detect_every:
+            return True
+        return any(track.confidence < self.min_confidence_ratio * track.detected_confidence
+                   for track in self.tracks)
+
+    def step(self, frame, detector):
+        """
+        Track objects in the next frame, running the detector only when needed
+        Args:
+            frame: numpy array (BGR format)
+            detector: YOLOObjectDetector (or BatchingDetector) instance
+        Returns:
+            dict: 'objects' (each with a 'track_id'), 'categories', and
+                  'new_objects' holding objects whose track started on this frame
+        """
+        detect = self.needs_detection()
+        for track in self.tracks:
+            track.predict(self.confidence_decay)
+
+        new_objects = []
+        if detect:
+            new_objects = self.update(detector.detect_objects(frame)['objects'])
+        else:
+            self._frames_since_detection += 1
+        self.frames += 1
+
+        objects = [track.to_object() for track in self.tracks]
+        return {
+            'objects': objects,
+            'categories': detector.taxonomy.categorize_objects(objects),
+            'new_objects': new_objects
+        }
+
+    def update(self, objects):
+        """
+        Match fresh detections to the predicted tracks
+        Returns:
+            list: Objects that started a new track
+        """
+        self.detector_calls += 1
+        self._frames_since_detection = 0
+
+        track_boxes = np.array([t.bbox for t in self.tracks], dtype=np.float64).reshape(-1, 4)
+        det_boxes = np.array([o['bbox'] for o in objects], dtype=np.float64).reshape(-1, 4)
+        iou = iou_matrix(track_boxes, det_boxes)
+        for i, track in enumerate(self.tracks):
+            for j, obj in enumerate(objects):
+                if obj['class'] != track.class_name:
+                    iou[i, j] = 0.0
+
+        # Greedy assignment, best overlaps first
+        matched_tracks, matched_dets = set(), set()
+        for flat in np.argsort(-iou, axis=None):
+            i, j = np.unravel_index(flat, iou.shape)
+            if iou[i, j] < self.iou_threshold:
+                break
+            if i in matched_tracks or j in matched_dets:
+                continue
+            self.tracks[i].update(objects[j])
+            matched_tracks.add(i)
+            matched_dets.add(j)
+
+        survivors = []
+        for i, track in enumerate(self.tracks):
+            if i not in matched_tracks:
+                track.missed += 1
+                if track.missed > self.max_missed:
+                    continue
+            survivors.append(track)
+
+        new_objects = []
+        for j, obj in enumerate(objects):
+            if j not in matched_dets:
+                track = KalmanBoxTrack(next(self._ids), obj)
+                survivors.append(track)
+                new_objects.append(track.to_object())
+
+        self.tracks = survivors
+        return new_objects
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'detector_calls': self.detector_calls,
+            'detector_call_ratio': self.detector_calls / self.frames if self.frames else 0.0,
+            'active_tracks': len(self.tracks),
+        }
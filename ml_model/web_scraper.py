@@ -2,11 +2,25 @@ import requests
 from bs4 import BeautifulSoup
 
 class WebScraper:
-    def __init__(self):
+    def __init__(self, knowledge_base=None, offline=False):
+        """
+        Args:
+            knowledge_base: Optional local KnowledgeBase answered before Wikipedia
+            offline: Never fall back to the network when the knowledge base misses
+        """
         self.base_url = "https://en.wikipedia.org/wiki/"
+        self.knowledge_base = knowledge_base
+        self.offline = offline
 
     def scrape_info(self, keyword):
-        """Fetches information about a topic from Wikipedia"""
+        """Fetches information about a topic from the local knowledge base or Wikipedia"""
+        if self.knowledge_base is not None:
+            info = self.knowledge_base.lookup(keyword)
+            if info:
+                return info
+        if self.offline:
+            return "⚠️ No relevant information found."
+
         search_url = f"{self.base_url}{keyword.replace(' ', '_')}"
         print(f"📢 Searching: {search_url}")
 
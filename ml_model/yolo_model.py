@@ -1,67 +1,325 @@
 # ml_model/yolo_model.py
+import os
+import shutil
 import torch
 from ultralytics import YOLO
 import cv2
 import numpy as np
 
+from ml_model.taxonomy import default_taxonomy
+
 class YOLOObjectDetector:
-    def __init__(self, model_path='yolov8n.pt'):
-        """Initialize YOLO model for object detection"""
-        self.model = YOLO(model_path)
-        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
-        print(f"Using device: {self.device}")
+    BACKENDS = ('pytorch', 'onnx', 'openvino')
+
+    # Class-to-category mapping; see ml_model/taxonomy.json
+    taxonomy = default_taxonomy
+
+    def __init__(self, model_path='yolov8n.pt', backend='pytorch', int8=False,
+                 export_dir='models', imgsz=640, calibration_data='coco8.yaml', taxonomy=None):
+        """
+        Initialize YOLO model for object detection
+        Args:
+            model_path: PyTorch weights the other backends are exported from
+            backend: 'pytorch', 'onnx' (ONNX Runtime) or 'openvino'
+            int8: Use an INT8 post-training-quantized variant (onnx/openvino only)
+            export_dir: Directory where exported models are cached
+            imgsz: Inference size baked into exported models
+            calibration_data: Dataset yaml used to calibrate OpenVINO INT8 export
+            taxonomy: Taxonomy used to categorize detections (defaults to the shared one)
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unsupported backend: {backend}")
+        if int8 and backend == 'pytorch':
+            raise ValueError("INT8 quantization requires the onnx or openvino backend")
+
+        self.backend = backend
+        self.int8 = int8
+        if taxonomy is not None:
+            self.taxonomy = taxonomy
+        self.model_path = self._prepare_model(model_path, export_dir, imgsz, calibration_data)
+        self.model = YOLO(self.model_path, task='detect')
+        self.device = 'cuda' if backend == 'pytorch' and torch.cuda.is_available() else 'cpu'
+        print(f"Using device: {self.device} ({backend}{', int8' if int8 else ''})")
+
+    def _prepare_model(self, model_path, export_dir, imgsz, calibration_data):
+        """Return the model artifact for the backend, exporting it once and caching it on disk"""
+        if self.backend == 'pytorch':
+            return model_path
+
+        stem = os.path.splitext(os.path.basename(model_path))[0]
+        variant = f"{stem}_int8" if self.int8 else stem
+        if self.backend == 'onnx':
+            target = os.path.join(export_dir, f"{variant}.onnx")
+        else:
+            target = os.path.join(export_dir, f"{variant}_openvino_model")
+
+        if os.path.exists(target):
+            print(f"📢 Using cached {self.backend} model: {target}")
+            return target
+
+        print(f"📢 Exporting {model_path} to {self.backend}{' (INT8)' if self.int8 else ''}...")
+        os.makedirs(export_dir, exist_ok=True)
+        source = YOLO(model_path)
+
+        if self.backend == 'onnx':
+            # Dynamic axes keep batched inference available
+            exported = source.export(format='onnx', imgsz=imgsz, dynamic=True, simplify=True)
+            if self.int8:
+                self._quantize_onnx(exported, target)
+                os.remove(exported)
+            else:
+                shutil.move(exported, target)
+        else:
+            exported = source.export(format='openvino', imgsz=imgsz, dynamic=True,
+                                     int8=self.int8, data=calibration_data)
+            shutil.move(exported, target)
+
+        print(f"✅ Exported model cached at {target}")
+        return target
+
+    def _quantize_onnx(self, source_path, target_path):
+        """Quantize ONNX weights to INT8, keeping the ultralytics metadata (names, stride, imgsz)"""
+        import onnx
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(source_path, target_path, weight_type=QuantType.QUInt8)
+
+        quantized = onnx.load(target_path)
+        del quantized.metadata_props[:]
+        quantized.metadata_props.extend(onnx.load(source_path).metadata_props)
+        onnx.save(quantized, target_path)
 
-    def detect_objects(self, image):
+    def detect_objects(self, image, output_format='objects'):
         """
         Detect objects in an image
         Args:
             image: numpy array (BGR format) or path to image
+            output_format: 'objects' for one dict per object, 'columnar' for
+                           parallel arrays of classes, confidences and boxes
         Returns:
             list: Detected objects with class, confidence, and coordinates
         """
         results = self.model(image)
-        return self._process_results(results[0])
+        return self._process_results(results[0], output_format)
+
+    def predict(self, images):
+        """Run one batched forward pass and return the raw YOLO results"""
+        return self.model(list(images))
+
+    def detect_batch(self, images, output_format='objects'):
+        """
+        Detect objects in several images with a single forward pass
+        Args:
+            images: list of numpy arrays (BGR format)
+            output_format: Format passed to _process_results
+        Returns:
+            list: One _process_results output per input image, in order
+        """
+        return [self._process_results(result, output_format) for result in self.predict(images)]
+
+    def detect_preprocessed(self, batch, meta, output_format='objects'):
+        """
+        Detect objects in an already letterboxed batch (see ImageProcessor.letterbox_batch)
+        Args:
+            batch: (N, 3, H, W) RGB array or tensor scaled to 0-1, H and W multiples of 32
+            meta: Per-image 'scale', 'pad' and 'shape' used to map boxes back
+            output_format: 'objects' or 'columnar'
+        Returns:
+            list: One detection dict per image, boxes in original image coordinates
+        """
+        return [
+            self._process_letterboxed(result, info, output_format)
+            for result, info in zip(self.predict_preprocessed(batch), meta)
+        ]
+
+    def predict_preprocessed(self, batch):
+        """Run one forward pass over a letterboxed batch and return the raw YOLO results"""
+        tensor = batch if isinstance(batch, torch.Tensor) else torch.from_numpy(batch)
+        return self.model(tensor)
+
+    def _process_letterboxed(self, result, info, output_format='objects'):
+        """Process a result from a letterboxed input, mapping boxes back to the original image"""
+        class_ids, confidences, bboxes, _ = self._extract_arrays(result)
+        pad_x, pad_y = info['pad']
+        height, width = info['shape']
+        bboxes = (bboxes - np.array([pad_x, pad_y, pad_x, pad_y], dtype=np.float32)) / info['scale']
+        np.clip(bboxes[:, 0::2], 0, width, out=bboxes[:, 0::2])
+        np.clip(bboxes[:, 1::2], 0, height, out=bboxes[:, 1::2])
+        centers = (bboxes[:, :2] + bboxes[:, 2:4]) / 2
+        class_names = [result.names[c] for c in class_ids.tolist()]
+        return self._format_arrays(class_names, class_ids, confidences, bboxes, centers, result.names, output_format)
+
+    def detect_tiled(self, image, output_format='objects', **tile_options):
+        """
+        Detect small objects in a high-resolution image by running overlapping tiles as one batch
+        Args:
+            image: numpy array (BGR format)
+            output_format: 'objects' or 'columnar'
+            tile_options: Passed to tile_image
+        Returns:
+            dict: Merged detections in original image coordinates
+        """
+        crops, offsets = self.tile_image(image, **tile_options)
+        results = self.detect_batch(crops, 'columnar')
+        return self.merge_tiles(results, offsets, output_format)
+
+    def tile_image(self, image, tile_size=640, overlap=0.2, min_tile_contrast=24, include_full=True):
+        """
+        Cut an image into overlapping tiles, skipping near-uniform background
+        Args:
+            image: numpy array (BGR format)
+            tile_size: Tile edge in pixels; matches the model input so tiles are not downscaled
+            overlap: Fraction of a tile shared with its neighbour, so objects on a seam
+                     appear whole in at least one tile
+            min_tile_contrast: Tiles whose grayscale range (max - min) is below this
+                               are skipped as background; a range test still
+                               keeps a tile holding a single small part
+            include_full: Also return the whole image, which catches objects larger than a tile
+        Returns:
+            tuple: (list of image crops, list of (x, y) offsets of each crop)
+        """
+        height, width = image.shape[:2]
+        if max(height, width) <= tile_size * 1.5:
+            return [image], [(0, 0)]  # Small enough for a single pass
+        crops, offsets = ([image], [(0, 0)]) if include_full else ([], [])
+
+        # Contrast is measured on a reduced copy; area averaging also smooths sensor noise
+        factor = 4
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        small = cv2.resize(gray, (max(1, width // factor), max(1, height // factor)), interpolation=cv2.INTER_AREA)
+
+        stride = max(1, int(tile_size * (1 - overlap)))
+        xs = self._tile_starts(width, tile_size, stride)
+        ys = self._tile_starts(height, tile_size, stride)
+        for y in ys:
+            for x in xs:
+                region = small[y // factor:(y + tile_size) // factor, x // factor:(x + tile_size) // factor]
+                if region.size and int(region.max()) - int(region.min()) < min_tile_contrast:
+                    continue
+                crops.append(np.ascontiguousarray(image[y:y + tile_size, x:x + tile_size]))
+                offsets.append((x, y))
+        return crops, offsets
+
+    @staticmethod
+    def _tile_starts(length, tile_size, stride):
+        """Tile origins along one axis, with the last tile flush against the edge"""
+        if length <= tile_size:
+            return [0]
+        starts = list(range(0, length - tile_size, stride))
+        starts.append(length - tile_size)
+        return starts
+
+    def merge_tiles(self, results, offsets, output_format='objects', merge_threshold=0.6):
+        """
+        Merge per-tile columnar detections with class-aware non-maximum suppression
+        Args:
+            results: Columnar detections, one per crop from tile_image
+            offsets: (x, y) offset of each crop
+            output_format: 'objects' or 'columnar'
+            merge_threshold: Boxes of one class whose intersection covers more than this
+                             fraction of the smaller box are merged into the stronger one
+        Returns:
+            dict: Detections in original image coordinates
+        """
+        class_names = [name for r in results for name in r['classes']]
+        if not class_names:
+            empty = np.zeros((0, 4), dtype=np.float32)
+            return self._format_arrays([], np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32),
+                                       empty, empty[:, :2], self.model.names, output_format)
+
+        class_ids = np.concatenate([np.asarray(r['class_ids'], dtype=np.int64) for r in results])
+        confidences = np.concatenate([np.asarray(r['confidences'], dtype=np.float32) for r in results])
+        bboxes = np.concatenate([
+            np.asarray(r['bboxes'], dtype=np.float32).reshape(-1, 4) + np.array([x, y, x, y], dtype=np.float32)
+            for r, (x, y) in zip(results, offsets)
+        ])
 
-    def _process_results(self, result):
+        keep = self._nms(bboxes, confidences, class_ids, merge_threshold)
+        bboxes = bboxes[keep]
+        centers = (bboxes[:, :2] + bboxes[:, 2:4]) / 2
+        return self._format_arrays([class_names[i] for i in keep.tolist()], class_ids[keep],
+                                   confidences[keep], bboxes, centers, self.model.names, output_format)
+
+    @staticmethod
+    def _nms(bboxes, scores, class_ids, threshold):
+        """
+        Greedy class-aware NMS using intersection over the smaller box, which also
+        removes partial boxes of an object cut by a tile edge
+        Returns:
+            numpy array: Indices of the boxes kept, strongest first
+        """
+        # Shifting each class into its own coordinate range keeps classes from suppressing each other
+        boxes = bboxes + (class_ids * (bboxes.max() + 1))[:, None]
+        areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+        order = np.argsort(-scores, kind='stable')
+        keep = []
+        while order.size:
+            i = order[0]
+            keep.append(i)
+            rest = order[1:]
+            inter_w = np.clip(np.minimum(boxes[i, 2], boxes[rest, 2]) - np.maximum(boxes[i, 0], boxes[rest, 0]), 0, None)
+            inter_h = np.clip(np.minimum(boxes[i, 3], boxes[rest, 3]) - np.maximum(boxes[i, 1], boxes[rest, 1]), 0, None)
+            overlap = inter_w * inter_h / np.maximum(np.minimum(areas[i], areas[rest]), 1e-9)
+            order = rest[overlap <= threshold]
+        return np.array(keep, dtype=np.int64)
+
+    def _extract_arrays(self, result):
+        """
+        Copy all boxes of a result to NumPy in one transfer
+        Returns:
+            tuple: (class ids, confidences, xyxy boxes, centers) as arrays
+        """
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            empty = np.zeros((0, 4), dtype=np.float32)
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32), empty, empty[:, :2]
+
+        # data rows are [x1, y1, x2, y2, (track_id,) conf, cls]
+        data = boxes.data.cpu().numpy()
+        xyxy = data[:, :4]
+        confidences = data[:, -2]
+        class_ids = data[:, -1].astype(np.int64)
+        centers = (xyxy[:, :2] + xyxy[:, 2:4]) / 2
+        return class_ids, confidences, xyxy, centers
+
+    def _process_results(self, result, output_format='objects'):
         """Process YOLO results into a structured format"""
-        detected_objects = []
-        
-        for box in result.boxes:
-            obj = {
-                'class': result.names[int(box.cls[0])],
-                'confidence': float(box.conf[0]),
-                'bbox': box.xyxy[0].cpu().numpy().tolist(),
-                'center': box.xywh[0].cpu().numpy().tolist()[:2]
+        class_ids, confidences, bboxes, centers = self._extract_arrays(result)
+        class_names = [result.names[c] for c in class_ids.tolist()]
+        return self._format_arrays(class_names, class_ids, confidences, bboxes, centers, result.names, output_format)
+
+    def _format_arrays(self, class_names, class_ids, confidences, bboxes, centers, names, output_format='objects'):
+        """Build the 'objects' or 'columnar' output from detection arrays"""
+        if output_format == 'columnar':
+            return {
+                'format': 'columnar',
+                'classes': class_names,
+                'class_ids': class_ids.tolist(),
+                'confidences': confidences.tolist(),
+                'bboxes': bboxes.tolist(),
+                'centers': centers.tolist(),
+                'categories': self.taxonomy.categorize(class_ids, names)
+            }
+        elif output_format != 'objects':
+            raise ValueError(f"Unsupported output format: {output_format}")
+
+        detected_objects = [
+            {
+                'class': name,
+                'confidence': confidence,
+                'bbox': bbox,
+                'center': center
             }
-            detected_objects.append(obj)
-            
+            for name, confidence, bbox, center in zip(
+                class_names, confidences.tolist(), bboxes.tolist(), centers.tolist()
+            )
+        ]
+
         return {
             'objects': detected_objects,
-            'categories': self._categorize_objects(detected_objects)
+            'categories': self.taxonomy.categorize_objects(detected_objects, class_ids, names)
         }
 
     def _categorize_objects(self, objects):
         """Categorize detected objects into educational domains"""
-        categories = {
-            'art_supplies': [],
-            'electronics': [],
-            'lab_equipment': [],
-            'educational_materials': [],
-            'other': []
-        }
-        
-        # Define category mappings
-        category_mapping = {
-            'pencil': 'art_supplies',
-            'pen': 'art_supplies',
-            'book': 'educational_materials',
-            'laptop': 'electronics',
-            'bottle': 'lab_equipment',
-            # Add more mappings as needed
-        }
-        
-        for obj in objects:
-            category = category_mapping.get(obj['class'], 'other')
-            categories[category].append(obj)
-            
-        return categories
\ No newline at end of file
+        return self.taxonomy.categorize_objects(objects)
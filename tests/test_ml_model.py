@@ -0,0 +1,344 @@
+# tests/test_ml_model.py
+import re
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from ml_model.content_generator import ContentGenerator
+from ml_model.content_store import ContentStore
+from ml_model.llm_client import CircuitBreaker, LLMClient, LLMResponse, LLMUnavailable, LocalStandInBackend, TokenBucket
+from ml_model.result_cache import PerceptualResultCache, image_hash_from_bytes
+from ml_model.single_flight import SingleFlight
+from ml_model.tracker import ObjectTracker
+
+
+class FakeScraper:
+    def scrape_info(self, keyword):
+        return f"About {keyword}"
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class BatchedModel:
+    """Answers batched module prompts, leaving out the components in `skip`"""
+
+    def __init__(self, skip=()):
+        self.skip = skip
+        self.prompts = []
+
+    def generate_content(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        if 'projects using' in prompt:
+            return FakeResponse("PROJECT 1\nTitle: T\nDescription: D\nComponents: c\nTime: 20\nSteps:\n1. s\n")
+        components = re.findall(r'^\s*Component:\s*(.+?)\s*$', prompt, re.MULTILINE)
+        if components:
+            return FakeResponse('\n'.join(
+                f"MODULE: {c}\nAbout {c}\nInstructions:\n1. Use {c}\nEND MODULE"
+                for c in components if c not in self.skip
+            ))
+        return FakeResponse("Single prompt overview\nInstructions:\n1. Use it")
+
+
+def make_generator(model=None, **kwargs):
+    generator = ContentGenerator(api_key=None, scraper=FakeScraper(),
+                                 llm=LLMClient(LocalStandInBackend(latency=0)), **kwargs)
+    if model is not None:
+        generator.text_model = model
+    return generator
+
+
+def test_parse_batched_modules_accepts_delimiter_variants():
+    generator = make_generator()
+    text = (
+        "Here are your modules.\n"
+        "**MODULE: Cup**\nA cup holds liquids.\nSafety:\nHot drinks burn.\nInstructions:\n1. Fill it\n"
+        "**END MODULE**\n"
+        "=== module: cell phone ===\nA phone.\nTips:\n- Charge it\n=== End Module ===\n"
+    )
+    modules = generator._parse_batched_modules(text, ['cup', 'Cell Phone'])
+
+    assert set(modules) == {'cup', 'Cell Phone'}
+    assert modules['cup']['overview'].strip() == "A cup holds liquids."
+    assert modules['cup']['safety'].strip() == "Hot drinks burn."
+    assert modules['cup']['instructions'] == ["Fill it"]
+    assert modules['Cell Phone']['overview'].strip() == "A phone."
+
+
+def test_parse_batched_modules_without_end_markers():
+    generator = make_generator()
+    text = "MODULE: cup\nCup overview\nMODULE: book\nBook overview\nInstructions:\n1. Read it"
+    modules = generator._parse_batched_modules(text, ['cup', 'book'])
+
+    assert modules['cup']['overview'].strip() == "Cup overview"
+    assert modules['book']['instructions'] == ["Read it"]
+
+
+def test_parse_batched_modules_skips_unknown_and_empty_sections():
+    generator = make_generator()
+    text = "MODULE: laptop\nNot requested\nEND MODULE\nMODULE: cup\nEND MODULE"
+    assert generator._parse_batched_modules(text, ['cup']) == {}
+
+
+def test_batched_prompt_falls_back_for_skipped_component():
+    model = BatchedModel(skip=('book',))
+    generator = make_generator(model, batch_prompts=True)
+
+    content = generator.generate_learning_content({'objects': [{'class': c} for c in ('cup', 'book', 'pen')]})
+
+    assert set(content['learning_modules']) == {'cup', 'book', 'pen'}
+    assert content['learning_modules']['book']['overview'].strip() == "Single prompt overview"
+    # One batched prompt, one project prompt and one fallback prompt for the skipped component
+    assert len(model.prompts) == 3
+    assert generator.stats()['batch_fallbacks'] == 1
+
+
+def run_concurrently(fn, count):
+    results, errors = [None] * count, [None] * count
+
+    def call(i):
+        try:
+            results[i] = fn()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    flights = SingleFlight()
+    executions = []
+
+    def slow():
+        executions.append(1)
+        time.sleep(0.1)
+        return {'projects': ['a']}
+
+    results, errors = run_concurrently(lambda: flights.do(('projects', 'cup'), slow), 8)
+
+    assert errors == [None] * 8
+    assert len(executions) == 1
+    assert all(result == {'projects': ['a']} for result in results)
+    # Shared results are copies, so callers cannot modify each other's
+    results[0]['projects'].append('b')
+    assert results[1] == {'projects': ['a']}
+    stats = flights.stats()
+    assert stats['projects']['executions'] == 1
+    assert stats['projects']['coalesced'] == 7
+    assert stats['in_flight'] == 0
+
+
+def test_single_flight_shares_errors_and_forgets_finished_calls():
+    flights = SingleFlight()
+
+    def failing():
+        time.sleep(0.1)
+        raise ValueError("quota")
+
+    _, errors = run_concurrently(lambda: flights.do(('module', 'cup'), failing), 4)
+    assert all(isinstance(error, ValueError) for error in errors)
+
+    # Nothing is cached once the call has finished
+    assert flights.do(('module', 'cup'), lambda: 'ok') == 'ok'
+    assert flights.stats()['module']['executions'] == 2
+
+
+@pytest.mark.parametrize('team_size', [None, '', 1, '1'])
+def test_project_key_normalizes(team_size):
+    assert ContentGenerator.project_key([' Cup', 'book', 'cup'], 'Beginner ', team_size) == \
+        (('book', 'cup'), 'beginner', 1)
+
+
+def test_token_bucket_allows_burst_then_paces():
+    bucket = TokenBucket(rate=20, burst=3)
+    assert all(bucket.acquire() < 0.01 for _ in range(3))
+
+    # An empty bucket refuses when the next token comes after the deadline
+    assert bucket.acquire(deadline=time.monotonic() + 0.01) is None
+    waited = bucket.acquire(deadline=time.monotonic() + 1.0)
+    assert 0.0 < waited < 0.1
+
+
+def test_token_bucket_refund_returns_unused_token():
+    bucket = TokenBucket(rate=1, burst=1)
+    bucket.acquire()
+    bucket.refund()
+    assert bucket.acquire(deadline=time.monotonic() + 0.01) is not None
+
+
+def test_llm_client_refunds_token_when_no_slot_frees_up():
+    backend = FlakyBackend(failures=0)
+    client = LLMClient(backend, rate_per_second=1, burst=1, max_concurrency=1)
+    client._slots.acquire()  # Another call holds the only slot
+    with pytest.raises(LLMUnavailable):
+        client.generate_content("prompt", timeout=0.05)
+    client._slots.release()
+
+    # The token spent on the abandoned call is available again
+    assert client.generate_content("prompt", timeout=0.05).text == "ok"
+
+
+def test_circuit_breaker_opens_then_allows_one_trial():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()  # The trial call
+    assert not breaker.allow()
+    breaker.release()  # Trial never made: the next caller may try
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.allow() and breaker.allow()
+
+
+class FlakyBackend:
+    name = 'flaky'
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def generate(self, model_name, contents, timeout):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("throttled")
+        return LLMResponse("ok", 1, 1)
+
+    @staticmethod
+    def is_retryable(error):
+        return isinstance(error, ConnectionError)
+
+
+def test_llm_client_retries_transient_errors():
+    backend = FlakyBackend(failures=2)
+    client = LLMClient(backend, rate_per_second=0, backoff=0.001, max_retries=3)
+
+    assert client.generate_content("prompt").text == "ok"
+    assert backend.calls == 3
+    stats = client.stats()
+    assert stats['retries'] == 2
+    assert stats['succeeded'] == 1
+    assert stats['circuit'] == 'closed'
+
+
+def test_content_deadline_reaches_llm_calls():
+    llm = LLMClient(LocalStandInBackend(latency=2.0), rate_per_second=0, timeout=30.0)
+    generator = ContentGenerator(api_key=None, scraper=FakeScraper(), llm=llm)
+
+    start = time.monotonic()
+    content = generator.generate_learning_content({'objects': [{'class': 'cup'}]}, timeout=0.2)
+    assert content['learning_modules'] == {}
+    assert content['project_suggestions'] == []
+
+    # The abandoned calls stop at the request deadline rather than the client's 30s timeout
+    while llm.stats()['in_flight'] and time.monotonic() - start < 2.0:
+        time.sleep(0.01)
+    assert llm.stats()['in_flight'] == 0
+    assert time.monotonic() - start < 1.0
+    assert llm.stats()['timed_out'] == 2
+
+
+def test_stored_content_is_kept_per_backend(tmp_path):
+    store = ContentStore(str(tmp_path / 'content.db'))
+    local = ContentGenerator(api_key=None, store=store, scraper=FakeScraper(),
+                             llm=LLMClient(LocalStandInBackend(latency=0)))
+    assert local.generate_module('cup') is not None
+
+    # A generator on another backend must not be served the stand-in text
+    other = ContentGenerator(api_key=None, store=store, scraper=FakeScraper(), llm=LLMClient(FlakyBackend(0)))
+    assert other._stored_module('cup') is None
+    assert local._stored_module('cup') is not None
+    store.close()
+
+
+def test_closing_content_events_cancels_unstarted_calls():
+    llm = LLMClient(LocalStandInBackend(latency=0.05), rate_per_second=0)
+    generator = ContentGenerator(api_key=None, scraper=FakeScraper(), llm=llm, max_concurrency=1)
+
+    events = generator.iter_learning_content({'objects': [{'class': c} for c in ('cup', 'book', 'pen')]})
+    assert next(events)['type'] == 'learning_module'
+    events.close()
+
+    # Only the call already running when the caller stopped is made
+    time.sleep(0.2)
+    assert llm.stats()['calls'] == 2
+
+
+class FakeTaxonomy:
+    def categorize_objects(self, objects):
+        return {}
+
+
+class StillDetector:
+    """Reports the same objects on every frame and records which frames it ran on"""
+    taxonomy = FakeTaxonomy()
+
+    def __init__(self, objects):
+        self.objects = objects
+        self.frames = []
+
+    def detect_objects(self, frame):
+        self.frames.append(frame)
+        return {'objects': [dict(obj) for obj in self.objects]}
+
+
+def track(tracker, detector, frames):
+    for frame in range(frames):
+        tracker.step(frame, detector)
+    return detector.frames
+
+
+def test_tracker_detects_periodically_without_tracks():
+    assert track(ObjectTracker(), StillDetector([]), 25) == [0, 10, 20]
+
+
+def test_tracker_detects_early_when_tracks_decay():
+    tracker = ObjectTracker()
+    cup = {'class': 'cup', 'confidence': 0.3, 'bbox': [10, 10, 50, 50]}
+
+    # 0.9 ** 7 < 0.5: re-detected after 7 propagated frames, before the periodic run
+    assert tracker.decay_horizon == 7
+    assert track(tracker, StillDetector([cup]), 25) == [0, 8, 16, 24]
+
+
+def test_result_cache_drops_expired_entries():
+    cache = PerceptualResultCache(ttl_seconds=0.05)
+    cache.put(0b1011, {'objects': []})
+    cache.put(0b1111 << 20, {'objects': []})
+    time.sleep(0.06)
+
+    cache.put(0b1 << 40, {'objects': []})
+    stats = cache.stats()
+    assert stats['entries'] == 1
+    assert stats['expirations'] == 2
+    assert stats['bytes'] == len('{"objects": []}')
+
+
+def test_result_cache_skips_uniform_images():
+    black, white = (cv2.imencode('.png', np.full((64, 64, 3), value, np.uint8))[1].tobytes() for value in (0, 255))
+    assert image_hash_from_bytes(black) == image_hash_from_bytes(white) == 0
+
+    cache = PerceptualResultCache()
+    cache.put(0, {'objects': [{'class': 'book'}]})
+    assert cache.get(0) is None
+    assert cache.stats()['entries'] == 0